@@ -1,6 +1,11 @@
 import subprocess
 import os
-import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from staging import STAGING_DB
+from columnar import ruta_dataset
+from rutas import DATA_DIR, ruta
 
 # ===========================
 #   CONFIGURACIÓN
@@ -28,6 +33,11 @@ temporadas = [
     "25-26"
 ]
 
+# Con DATA_DIR cada temporada va a su directorio (ver rutas.py) y se pueden
+# procesar varias a la vez. Cada proceso tiene su propio limitador de
+# peticiones: N temporadas en paralelo = N veces más carga para livefutbol.
+PARALLEL_SEASONS = int(os.environ.get("PARALLEL_SEASONS", "1"))
+
 # Validación simple
 if len(urls) != len(temporadas):
     raise ValueError("La cantidad de URLs debe coincidir con la cantidad de temporadas.")
@@ -37,27 +47,22 @@ if len(urls) != len(temporadas):
 #   FUNCIONES AUXILIARES
 # ===========================
 
-def replace_variable_in_file(file_path, variable_name, new_value):
+def env_temporada(url, temporada):
     """
-    Busca la línea variable_name = "..." y la reemplaza por una nueva.
+    Entorno de los scripts de una temporada: SEASON_URL y TEMPORADA se pasan
+    por variables de entorno en lugar de reescribir los .py (así dos
+    temporadas no se pisan).
     """
-    with open(file_path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    # regex: variable = "cualquier cosa"
-    new_content = re.sub(
-        rf'{variable_name}\s*=\s*"(.*?)"',
-        f'{variable_name} = "{new_value}"',
-        content
-    )
+    env = dict(os.environ, SEASON_URL=url, TEMPORADA=temporada)
+    if DATA_DIR:
+        env["METRICS_JSON"] = ruta("run_metrics.json", temporada)
+        env["METRICS_PROM"] = ruta("scraper_metrics.prom", temporada)
+    return env
 
-    with open(file_path, "w", encoding="utf-8") as f:
-        f.write(new_content)
 
-
-def ejecutar_script(script):
+def ejecutar_script(script, env=None):
     print(f"\n▶ Ejecutando {script} ...")
-    resultado = subprocess.run(["python", script])
+    resultado = subprocess.run(["python", script], env=env)
     if resultado.returncode != 0:
         raise RuntimeError(f"❌ El script {script} falló.")
 
@@ -65,10 +70,18 @@ def ejecutar_script(script):
 def borrar_csv_generados():
     csv_files = [
         "players_stats.csv", "resultados_partidos.csv", "team_stats.csv",
+        "apariciones.csv", "players_stats.base.csv",
         "dfequipos.csv", "dfequiposracha.csv",
         "equipos_jornadas.csv", "equipos_jornadasracha.csv"
     ]
 
+    # Con DATA_FORMAT=parquet los datasets son .parquet
+    csv_files += [ruta_dataset(f) for f in csv_files if ruta_dataset(f) != f]
+
+    # El staging es por temporada: se borra con los CSV (y sus ficheros WAL)
+    if STAGING_DB:
+        csv_files += [STAGING_DB, STAGING_DB + "-wal", STAGING_DB + "-shm"]
+
     for file in csv_files:
         if os.path.exists(file):
             os.remove(file)
@@ -79,33 +92,45 @@ def borrar_csv_generados():
 #   BUCLE PRINCIPAL
 # ===========================
 
-for url, temporada in zip(urls, temporadas):
+# La importación a MySQL va de una en una: mysql_impoter.py inserta los
+# equipos nuevos tras leer los existentes
+_mysql_lock = threading.Lock()
+
+
+def procesar_temporada(url, temporada):
 
     print("\n===================================================")
     print(f"   🚀 PROCESANDO TEMPORADA {temporada}")
     print("===================================================\n")
 
-    # 1) Cambiar la variable SEASON_URL en scrapper_final.py
-    replace_variable_in_file("scrapper_final.py", "SEASON_URL", url)
-
-    # 2) Ejecutar scrapper_final.py
-    ejecutar_script("scrapper_final.py")
+    env = env_temporada(url, temporada)
 
-    # 3) Ejecutar convertidordatos.py
-    ejecutar_script("convertidordatos.py")
+    # 1) Ejecutar scrapper_final.py (SEASON_URL por entorno)
+    ejecutar_script("scrapper_final.py", env)
 
-    # 4) Cambiar TEMPORADA en mysql_impoter.py
-    replace_variable_in_file("mysql_impoter.py", "TEMPORADA", temporada)
+    # 2) Ejecutar convertidordatos.py
+    ejecutar_script("convertidordatos.py", env)
 
-    # 5) Ejecutar mysql_impoter.py
-    ejecutar_script("mysql_impoter.py")
+    # 3) Ejecutar mysql_impoter.py (TEMPORADA por entorno)
+    with _mysql_lock:
+        ejecutar_script("mysql_impoter.py", env)
 
-    # 6) Borrar CSV generados
-    borrar_csv_generados()
+    # 4) Sin DATA_DIR todas las temporadas usan los mismos ficheros: se borran.
+    #    Con DATA_DIR cada temporada se queda en su directorio
+    if not DATA_DIR:
+        borrar_csv_generados()
 
     print(f"\n🎉 TEMPORADA {temporada} COMPLETADA CORRECTAMENTE\n")
 
 
+if DATA_DIR and PARALLEL_SEASONS > 1:
+    with ThreadPoolExecutor(max_workers=PARALLEL_SEASONS) as pool:
+        list(pool.map(procesar_temporada, urls, temporadas))
+else:
+    for url, temporada in zip(urls, temporadas):
+        procesar_temporada(url, temporada)
+
+
 print("\n===================================================")
 print("  ✅ TODAS LAS TEMPORADAS FUERON PROCESADAS")
 print("===================================================\n")
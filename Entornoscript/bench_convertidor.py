@@ -0,0 +1,210 @@
+###############################################
+# BENCHMARK DEL CONVERTIDOR (BÚSQUEDA DE STATS Y RACHAS)
+# Temporadas sintéticas apiladas (jornadas consecutivas) para
+# comparar la búsqueda vectorizada stats_por_equipo con la
+# antigua (apply fila a fila), y medias_previas con los lambdas
+# por columna de _pp / _racha, y ver cómo escala con N temporadas.
+#
+#   python bench_convertidor.py [--temporadas 1 2 4 8 12] [--max-filas 4] [--repeat 3]
+#   (RACHA_EXTRA=3,10 como en convertidordatos.py)
+###############################################
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import convertidordatos as cd
+
+EQUIPOS = 20
+STATS = [
+    "Amarillo", "Amarillo-Rojo", "Córners", "Duelos", "Faltas cometidas", "Fuera de juego",
+    "Pases exitosos", "Pases ges.", "Posesión de balón en %", "Rojo", "Tiros a puerta",
+]
+
+
+############################################################
+# DATOS SINTÉTICOS
+############################################################
+
+def temporada_sintetica(rng, primera_jornada=1, equipos=EQUIPOS):
+    """
+    resultados_partidos y team_stats de una liga a doble vuelta con el
+    formato del scraper; las jornadas empiezan en `primera_jornada`.
+    """
+    eq = [f"Equipo {i:02d}" for i in range(equipos)]
+    orden = list(range(equipos))
+    vueltas = []
+    for _ in range(equipos - 1):
+        vueltas.append([(orden[i], orden[equipos - 1 - i]) for i in range(equipos // 2)])
+        orden = [orden[0], orden[-1]] + orden[1:-1]
+    vueltas += [[(b, a) for a, b in partidos] for partidos in vueltas]
+
+    resultados, stats = [], []
+    for j, partidos in enumerate(vueltas, primera_jornada):
+        jornada = f"{j}. Jornada"
+        for a, b in partidos:
+            resultados.append((jornada, "01/09/2024", eq[a], eq[b],
+                               f"{rng.integers(0, 5)}:{rng.integers(0, 5)}", ""))
+            for s in STATS:
+                stats.append((jornada, "01/09/2024", eq[a], eq[b], s,
+                              float(rng.integers(0, 20)), float(rng.integers(0, 20))))
+    return (
+        pd.DataFrame(resultados, columns=["jornada", "fecha", "local", "visitante", "resultado", "lineup_url"]),
+        pd.DataFrame(stats, columns=["jornada", "fecha", "local", "visitante", "stat",
+                                     "valor_local", "valor_visitante"]),
+    )
+
+
+def temporadas_apiladas(n, seed=0):
+    rng = np.random.default_rng(seed)
+    jornadas = 2 * (EQUIPOS - 1)
+    partes = [temporada_sintetica(rng, 1 + k * jornadas) for k in range(n)]
+    return (pd.concat([r for r, _ in partes], ignore_index=True),
+            pd.concat([s for _, s in partes], ignore_index=True))
+
+
+############################################################
+# BÚSQUEDA ANTIGUA (REFERENCIA)
+############################################################
+
+def stats_por_filas(equipos_jornadas, stats_pivot, cols_local, cols_visitante):
+    """La búsqueda de antes: un filtro de stats_pivot por cada fila (O(filas x partidos))."""
+    def obtener_stats(row):
+        partido = stats_pivot[
+            (stats_pivot["jornada"] == row["jornada"])
+            & ((stats_pivot["local"] == row["equipo"]) | (stats_pivot["visitante"] == row["equipo"]))
+        ]
+        if partido.empty:
+            return pd.Series({col: None for col in cols_local})
+        partido = partido.iloc[0]
+        if row["es_visitante"] == 1:
+            datos = partido[cols_visitante]
+            datos.index = cols_local
+        else:
+            datos = partido[cols_local]
+        return datos
+
+    return equipos_jornadas.apply(obtener_stats, axis=1)
+
+
+def medias_por_columna(df, cols, ventanas):
+    """Las medias de antes: un transform con lambda por columna y ventana."""
+    g = df.groupby("equipo")
+    medias = {"pp": pd.DataFrame({c: g[c].transform(lambda s: s.shift().expanding().mean()) for c in cols})}
+    for N in ventanas:
+        medias[N] = pd.DataFrame({
+            c: g[c].transform(lambda x: x.shift().rolling(window=N, min_periods=1).mean()) for c in cols
+        })
+    return medias
+
+
+############################################################
+# BENCHMARK
+############################################################
+
+def convertir_con(busqueda, resultados, stats, repeat):
+    """
+    Mejor tiempo de `repeat` conversiones completas con `busqueda` como
+    stats_por_equipo, y el tiempo de la búsqueda dentro de la mejor.
+    """
+    original = cd.stats_por_equipo
+    tiempos = {}
+
+    def cronometrada(*args):
+        t0 = time.perf_counter()
+        out = busqueda(*args)
+        tiempos["busqueda"] = time.perf_counter() - t0
+        return out
+
+    mejor, tablas = None, None
+    cd.stats_por_equipo = cronometrada
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                tablas = cd.convertir(resultados.copy(), stats.copy())
+                total = time.perf_counter() - t0
+                if mejor is None or total < mejor[0]:
+                    mejor = (total, tiempos["busqueda"])
+    finally:
+        cd.stats_por_equipo = original
+    return mejor, tablas
+
+
+def medias_con(fn, df, cols, ventanas, repeat):
+    mejor, medias = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        medias = fn(df, cols, ventanas)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor, medias
+
+
+def iguales(a, b):
+    for nombre in a:
+        try:
+            pd.testing.assert_frame_equal(a[nombre], b[nombre], check_dtype=False)
+        except AssertionError:
+            return False
+    return True
+
+
+def run(temporadas, max_filas=4, repeat=3, seed=0):
+    report = {}
+    for n in temporadas:
+        resultados, stats = temporadas_apiladas(n, seed)
+        (total, busqueda), tablas = convertir_con(cd.stats_por_equipo, resultados, stats, repeat)
+        filas = len(tablas["equipos_jornadas"])
+        r = {
+            "filas": filas,
+            "convertir_seg": round(total, 4),
+            "busqueda_seg": round(busqueda, 4),
+            "busqueda_us_por_fila": round(busqueda / filas * 1e6, 2),
+        }
+        if n <= max_filas:
+            (total_ant, busqueda_ant), tablas_ant = convertir_con(stats_por_filas, resultados, stats, 1)
+            r["apply_convertir_seg"] = round(total_ant, 4)
+            r["apply_busqueda_seg"] = round(busqueda_ant, 4)
+            r["aceleracion"] = round(busqueda_ant / busqueda, 1) if busqueda else None
+            r["salidas_iguales"] = iguales(tablas, tablas_ant)
+
+        # Medias _pp / _racha de todas las columnas de racha y ventanas
+        df = tablas["equipos_jornadas"]
+        cols = [c for c in df.columns if f"{c}_racha" in tablas["equipos_jornadasracha"].columns]
+        ventanas = [cd.RACHA_N] + [M for M in cd.RACHA_EXTRA if M != cd.RACHA_N]
+        t_nuevo, nuevas = medias_con(cd.medias_previas, df, cols, ventanas, repeat)
+        t_lambda, antiguas = medias_con(medias_por_columna, df, cols, ventanas, repeat)
+        r["medias_ventanas"] = ["pp"] + ventanas
+        r["medias_seg"] = round(t_nuevo, 4)
+        r["medias_lambda_seg"] = round(t_lambda, 4)
+        r["medias_iguales"] = all(nuevas[k].equals(antiguas[k]) for k in nuevas)
+        report[f"{n}_temporadas"] = r
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la búsqueda de stats y las rachas del convertidor")
+    parser.add_argument("--temporadas", type=int, nargs="+", default=[1, 2, 4, 8, 12])
+    parser.add_argument("--max-filas", type=int, default=4,
+                        help="comparar con el apply fila a fila hasta N temporadas (es cuadrático)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report = run(args.temporadas, args.max_filas, args.repeat, args.seed)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if any(r.get("salidas_iguales") is False or not r["medias_iguales"] for r in report.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
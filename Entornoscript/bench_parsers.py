@@ -0,0 +1,301 @@
+###############################################
+# MICRO-BENCHMARK DE PARSERS
+# Fixtures HTML congeladas + comprobación contra salidas golden
+#
+#   python bench_parsers.py freeze --record grabacion --out bench_fixtures [--fantasy-url URL]
+#   python bench_parsers.py golden --fixtures bench_fixtures [--ref REV]
+#   python bench_parsers.py run    --fixtures bench_fixtures [--repeat 5 --number 20]
+#
+# bench_fixtures/ (en el repo): páginas pequeñas con la estructura de
+# livefutbol / futbolfantasy y su golden, sacado con --ref de los parsers
+# BeautifulSoup anteriores a lxml.
+###############################################
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+import tracemalloc
+
+# BENCH_SRC: raíz de otra versión del repo (la pone `golden --ref`); los parsers se importan de ahí
+SRC = os.environ.get("BENCH_SRC") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(SRC, "Entornoscript"))
+# scripts/ al final: su scrapper_final.py antiguo no debe tapar al de Entornoscript
+sys.path.append(os.path.join(SRC, "scripts"))
+
+import scrapper_final as sf
+import scrapper as fantasy
+from fetch_strategy import url_class
+from replay import load_index
+
+MANIFEST = "fixtures.json"
+GOLDEN = "golden.json"
+PER_KIND = 5
+
+
+class _PoolFijo:
+    """Pool de Chrome falso que sirve siempre el mismo HTML."""
+
+    def __init__(self, html):
+        self.html = html
+
+    def fetch(self, url, **kwargs):
+        return self.html
+
+
+def parsear_fantasy(html, url):
+    if hasattr(fantasy, "parsear_datos"):
+        return fantasy.parsear_datos(html)
+    # Versiones anteriores (--ref): el parsing solo existe dentro de obtener_datos
+    fantasy.get_pool = lambda: _PoolFijo(html)
+    return fantasy.obtener_datos(url)
+
+# tipo de fixture -> [(nombre del parser, función(html, url))]
+PARSERS = {
+    "season": [
+        ("parsear_partidos", lambda html, url: sf.parsear_partidos(html)),
+    ],
+    "lineup": [
+        ("procesar_lineup_html", lambda html, url: sf.procesar_lineup_html(html)),
+        ("get_correct_team_stats_link_from_lineup", lambda html, url: sf.extraer_team_stats_link(html)),
+    ],
+    "team-statistics": [
+        ("parse_team_statistics_page", lambda html, url: sf.parsear_team_statistics_html(html, url)),
+    ],
+    "fantasy": [
+        ("obtener_datos", parsear_fantasy),
+    ],
+}
+
+
+############################################################
+# FIXTURES
+############################################################
+
+def _save_fixture(out, manifest, kind, url, html):
+    name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".html"
+    os.makedirs(os.path.join(out, kind), exist_ok=True)
+    with open(os.path.join(out, kind, name), "w", encoding="utf-8") as f:
+        f.write(html)
+    manifest.setdefault(kind, []).append({"file": f"{kind}/{name}", "url": url})
+
+
+def freeze(record_dir, out, per_kind=PER_KIND, fantasy_urls=()):
+    """
+    Congela páginas reales como fixtures: las de livefutbol salen de una
+    grabación de replay.py; las de futbolfantasy se descargan con Chrome.
+    """
+    manifest = {}
+    if record_dir:
+        index = load_index(record_dir)
+        for path, name in sorted(index.items()):
+            kind = url_class(sf.BASE + path).split("|", 1)[1]
+            if kind not in PARSERS or len(manifest.get(kind, [])) >= per_kind:
+                continue
+            with open(os.path.join(record_dir, "pages", name), "r", encoding="utf-8") as f:
+                _save_fixture(out, manifest, kind, sf.BASE + path, f.read())
+
+    for url in fantasy_urls:
+        html = fantasy.get_pool().fetch(url, wait_class="columna_puntos")
+        if html:
+            _save_fixture(out, manifest, "fantasy", url, html)
+        else:
+            print(f"[freeze] No se pudo descargar {url}")
+
+    with open(os.path.join(out, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"[freeze] {sum(len(v) for v in manifest.values())} fixtures en {out}: "
+          + ", ".join(f"{k}={len(v)}" for k, v in manifest.items()))
+
+
+def load_fixtures(fixtures_dir):
+    with open(os.path.join(fixtures_dir, MANIFEST), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    pages = {}
+    for kind, items in manifest.items():
+        for it in items:
+            with open(os.path.join(fixtures_dir, it["file"]), "r", encoding="utf-8") as f:
+                pages.setdefault(kind, []).append((it["file"], it["url"], f.read()))
+    return pages
+
+
+############################################################
+# SALIDAS GOLDEN
+############################################################
+
+def _jsonable(value):
+    """Normaliza una salida de parser a JSON (claves tupla -> pares ordenados)."""
+    if isinstance(value, dict):
+        if all(isinstance(k, str) for k in value):
+            return {k: _jsonable(v) for k, v in value.items()}
+        return sorted(([_jsonable(k), _jsonable(v)] for k, v in value.items()), key=str)
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def _run_quiet(fn, html, url):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return fn(html, url)
+
+
+def outputs(pages):
+    res = {}
+    for kind, parsers in PARSERS.items():
+        for parser, fn in parsers:
+            for file, url, html in pages.get(kind, []):
+                res[f"{parser}|{file}"] = json.loads(json.dumps(_jsonable(_run_quiet(fn, html, url))))
+    return res
+
+
+def write_golden(fixtures_dir):
+    res = outputs(load_fixtures(fixtures_dir))
+    with open(os.path.join(fixtures_dir, GOLDEN), "w", encoding="utf-8") as f:
+        json.dump(res, f, indent=1, ensure_ascii=False, sort_keys=True)
+    print(f"[golden] {len(res)} salidas guardadas en {os.path.join(fixtures_dir, GOLDEN)}")
+
+
+def golden_de_ref(fixtures_dir, ref):
+    """
+    golden.json con los parsers de la revisión git `ref` (p.ej. los de
+    BeautifulSoup de antes de lxml): se extrae con git archive y este
+    script se ejecuta con BENCH_SRC apuntando a ella.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    root = subprocess.run(["git", "-C", here, "rev-parse", "--show-toplevel"],
+                          capture_output=True, text=True, check=True).stdout.strip()
+    tar = subprocess.run(["git", "-C", root, "archive", "--format=tar", ref, "Entornoscript", "scripts"],
+                         capture_output=True, check=True).stdout
+
+    with tempfile.TemporaryDirectory() as src:
+        with tarfile.open(fileobj=io.BytesIO(tar)) as t:
+            t.extractall(src)
+        subprocess.run([sys.executable, os.path.abspath(__file__), "golden",
+                        "--fixtures", os.path.abspath(fixtures_dir)],
+                       env=dict(os.environ, BENCH_SRC=src), check=True)
+    print(f"[golden] Parsers de la revisión {ref}")
+
+
+def check_golden(fixtures_dir, pages):
+    """Devuelve la lista de claves parser|fixture cuya salida ha cambiado."""
+    path = os.path.join(fixtures_dir, GOLDEN)
+    if not os.path.exists(path):
+        print("[golden] Sin golden.json: ejecuta primero 'golden'")
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        golden = json.load(f)
+    actual = outputs(pages)
+    return sorted(k for k in golden.keys() | actual.keys() if golden.get(k) != actual.get(k))
+
+
+############################################################
+# BENCHMARK
+############################################################
+
+def bench_parser(fn, docs, repeat=5, number=20):
+    """
+    Tiempo (mejor de `repeat` tandas de `number` pasadas por todas las
+    fixtures) y memoria de una pasada con tracemalloc (solo memoria de
+    Python: los árboles de libxml2 no aparecen).
+    """
+    best = float("inf")
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for _ in range(number):
+                for _, url, html in docs:
+                    fn(html, url)
+            best = min(best, (time.perf_counter() - t0) / number)
+
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        kept = [fn(html, url) for _, url, html in docs]
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    diff = after.compare_to(before, "filename")
+    del kept
+    return {
+        "paginas": len(docs),
+        "seg_por_pasada": round(best, 6),
+        "paginas_por_segundo": round(len(docs) / best, 1) if best else None,
+        "asignaciones_vivas": sum(d.count_diff for d in diff if d.count_diff > 0),
+        "pico_kb": round(peak / 1024, 1),
+    }
+
+
+def run(fixtures_dir, repeat=5, number=20):
+    pages = load_fixtures(fixtures_dir)
+    report = {}
+    for kind, parsers in PARSERS.items():
+        docs = pages.get(kind, [])
+        if not docs:
+            continue
+        for parser, fn in parsers:
+            report[parser] = bench_parser(fn, docs, repeat, number)
+
+    changed = check_golden(fixtures_dir, pages)
+    report["_golden"] = "sin golden" if changed is None else ("ok" if not changed else changed)
+    return report
+
+
+############################################################
+# CLI
+############################################################
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Micro-benchmark de los parsers HTML")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    f = sub.add_parser("freeze", help="congela fixtures a partir de una grabación")
+    f.add_argument("--record", help="directorio de replay.py record")
+    f.add_argument("--out", required=True)
+    f.add_argument("--per-kind", type=int, default=PER_KIND)
+    f.add_argument("--fantasy-url", action="append", default=[])
+
+    g = sub.add_parser("golden", help="guarda las salidas actuales como golden")
+    g.add_argument("--fixtures", required=True)
+    g.add_argument("--ref", help="revisión git cuyos parsers generan el golden (por defecto, los actuales)")
+
+    r = sub.add_parser("run", help="mide los parsers y compara con golden")
+    r.add_argument("--fixtures", required=True)
+    r.add_argument("--repeat", type=int, default=5)
+    r.add_argument("--number", type=int, default=20)
+    r.add_argument("--json", help="guardar el informe en este fichero")
+
+    args = ap.parse_args(argv)
+
+    if args.cmd == "freeze":
+        freeze(args.record, args.out, args.per_kind, args.fantasy_url)
+        return 0
+
+    if args.cmd == "golden":
+        if args.ref:
+            golden_de_ref(args.fixtures, args.ref)
+        else:
+            write_golden(args.fixtures)
+        return 0
+
+    report = run(args.fixtures, args.repeat, args.number)
+    for parser, stats in report.items():
+        if parser == "_golden":
+            continue
+        print(f"{parser:>40}: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+    print(f"{'golden':>40}: {report['_golden']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+    # Sin golden no hay con qué comparar: un speedup podría cambiar los datos sin avisar
+    return 0 if report["_golden"] == "ok" else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
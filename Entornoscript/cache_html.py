@@ -0,0 +1,153 @@
+###############################################
+# CACHÉ EN DISCO DE PÁGINAS HTML
+# Direccionada por contenido, con TTL por patrón de URL,
+# revalidación ETag / Last-Modified y modo offline
+###############################################
+
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+
+CACHE_DIR = os.environ.get("HTML_CACHE_DIR", ".cache_html")
+
+# "on"      -> usa la caché y la red
+# "off"     -> ni lee ni escribe caché
+# "offline" -> SOLO lee de la caché; nunca toca la red
+CACHE_MODE = os.environ.get("HTML_CACHE_MODE", "on")
+
+NEVER = math.inf
+
+# Primera regla que encaje gana. TTL en segundos.
+TTL_RULES = [
+    (re.compile(r"/all-matches/"), 6 * 3600),      # calendario: cambia cada jornada
+    (re.compile(r"/match-report/"), NEVER),         # partidos terminados: no cambian
+]
+DEFAULT_TTL = 24 * 3600
+
+# TTL para páginas de partidos aún sin jugar (el lineup se rellena más tarde)
+PENDING_MATCH_TTL = 3600
+
+
+def ttl_for(url):
+    for pattern, ttl in TTL_RULES:
+        if pattern.search(url):
+            return ttl
+    return DEFAULT_TTL
+
+
+def _sha(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class HtmlCache:
+    """
+    Caché de páginas en disco.
+
+    - objects/<sha256 del contenido>.html.gz : cuerpo comprimido (deduplicado)
+    - urls/<sha256 de la URL>.json           : metadatos de la URL
+      {url, sha, fetched_at, etag, last_modified}
+    """
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = root
+        self._objects = os.path.join(root, "objects")
+        self._urls = os.path.join(root, "urls")
+        os.makedirs(self._objects, exist_ok=True)
+        os.makedirs(self._urls, exist_ok=True)
+
+    # ---------- rutas ----------
+
+    def _meta_path(self, url):
+        return os.path.join(self._urls, _sha(url.encode("utf-8")) + ".json")
+
+    def _object_path(self, sha):
+        return os.path.join(self._objects, sha + ".html.gz")
+
+    def _write_atomic(self, path, data):
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    # ---------- API ----------
+
+    def lookup(self, url, ttl=None):
+        """
+        Devuelve la entrada cacheada de `url` o None:
+        {'html', 'fresh', 'etag', 'last_modified'}
+        """
+        try:
+            with open(self._meta_path(url), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            with gzip.open(self._object_path(meta["sha"]), "rb") as f:
+                html = f.read().decode("utf-8")
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if ttl is None:
+            ttl = ttl_for(url)
+        age = time.time() - meta.get("fetched_at", 0)
+
+        return {
+            "html": html,
+            "fresh": age < ttl,
+            "etag": meta.get("etag"),
+            "last_modified": meta.get("last_modified"),
+        }
+
+    def store(self, url, html, etag=None, last_modified=None):
+        data = html.encode("utf-8")
+        sha = _sha(data)
+        obj = self._object_path(sha)
+        if not os.path.exists(obj):
+            self._write_atomic(obj, gzip.compress(data))
+
+        meta = {
+            "url": url,
+            "sha": sha,
+            "fetched_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+        }
+        self._write_atomic(self._meta_path(url), json.dumps(meta).encode("utf-8"))
+
+    def touch(self, url):
+        """Marca la entrada como recién validada (respuesta 304)."""
+        path = self._meta_path(url)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return
+        meta["fetched_at"] = time.time()
+        self._write_atomic(path, json.dumps(meta).encode("utf-8"))
+
+
+def conditional_headers(entry):
+    """Cabeceras If-None-Match / If-Modified-Since para revalidar una entrada."""
+    headers = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """Caché compartida del proceso, o None si HTML_CACHE_MODE=off."""
+    global _cache
+    if CACHE_MODE == "off":
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HtmlCache()
+        return _cache
@@ -0,0 +1,108 @@
+###############################################
+# CHECKPOINT APPEND-ONLY (JSONL)
+# Una línea por partido procesado: O(1) por partido y
+# fsync por lotes en lugar de reescribir todo el JSON
+###############################################
+
+import json
+import os
+import threading
+import time
+
+PROCESSED_JOURNAL = "processed_matches.jsonl"
+FSYNC_EVERY = int(os.environ.get("CHECKPOINT_FSYNC_EVERY", "10"))      # partidos entre fsync
+FSYNC_SECONDS = float(os.environ.get("CHECKPOINT_FSYNC_SECONDS", "5"))  # ... o segundos
+
+
+class CheckpointJournal:
+    """
+    Diario de partidos procesados. Cada commit añade una línea
+    {"id": ..., "ts": ..., "offsets": {...}}; al arrancar se lee entero en
+    un set, así comprobar si un partido ya está hecho es instantáneo.
+    `offsets` guarda el último tamaño confirmado de los CSV de salida.
+    Una última línea cortada (proceso matado a mitad) se ignora.
+    `on_sync` se llama antes de cada fsync (para sincronizar antes los datos).
+    """
+
+    def __init__(self, path=PROCESSED_JOURNAL, fsync_every=FSYNC_EVERY, fsync_seconds=FSYNC_SECONDS):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_seconds = fsync_seconds
+        self.done = set()
+        self.offsets = None
+        self.on_sync = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+        needs_newline = False
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                line = ""
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue
+                    if rec.get("id"):
+                        self.done.add(rec["id"])
+                    if rec.get("offsets") is not None:
+                        self.offsets = rec["offsets"]
+                needs_newline = bool(line) and not line.endswith("\n")
+
+        self._f = open(path, "a", encoding="utf-8")
+        if needs_newline:
+            self._f.write("\n")
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def __len__(self):
+        return len(self.done)
+
+    def commit(self, key, **extra):
+        with self._lock:
+            if key in self.done:
+                return
+            self.done.add(key)
+            self._append({"id": key, "ts": round(time.time(), 3), **extra})
+
+    def mark(self, offsets):
+        """Confirma offsets sin partido (p.ej. las cabeceras de los CSV al empezar)."""
+        with self._lock:
+            self._append({"ts": round(time.time(), 3), "offsets": offsets})
+
+    def _append(self, rec):
+        self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        self._f.flush()
+        if rec.get("offsets") is not None:
+            self.offsets = rec["offsets"]
+        self._pending += 1
+        if self._pending >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_seconds:
+            self._sync_locked()
+
+    def _sync_locked(self):
+        if self._pending:
+            if self.on_sync:
+                self.on_sync()
+            os.fsync(self._f.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self):
+        with self._lock:
+            self._sync_locked()
+
+    def close(self):
+        with self._lock:
+            if not self._f.closed:
+                self._sync_locked()
+                self._f.close()
+
+
+def load_legacy(path):
+    """Claves del antiguo processed_matches.json ('fecha|local|visitante'), o set vacío."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {k for k, v in json.load(f).items() if v}
@@ -0,0 +1,184 @@
+###############################################
+# POOL DE CHROME HEADLESS
+# Navegadores reutilizables para el fallback Selenium
+# (livefutbol y futbolfantasy)
+###############################################
+
+import atexit
+import os
+import queue
+import threading
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+from webdriver_manager.chrome import ChromeDriverManager
+
+POOL_SIZE = int(os.environ.get("SELENIUM_POOL_SIZE", "2"))   # navegadores vivos como máximo
+MAX_PAGES_PER_DRIVER = 50    # tras N páginas se recicla el navegador (evita fugas de memoria)
+WAIT_TIMEOUT = 15            # segundos máximos esperando el selector requerido
+PAGE_LOAD_TIMEOUT = 30
+
+_driver_path = None
+_driver_path_lock = threading.Lock()
+
+
+def get_driver_path():
+    """
+    Ruta del binario chromedriver. ChromeDriverManager().install() solo se
+    ejecuta una vez por proceso.
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
+def new_driver():
+    opts = Options()
+    opts.add_argument("--headless=new")
+    opts.add_argument("--no-sandbox")
+    opts.add_argument("--disable-gpu")
+    opts.add_argument("--blink-settings=imagesEnabled=false")
+
+    driver = webdriver.Chrome(service=Service(get_driver_path()), options=opts)
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    return driver
+
+
+class ChromePool:
+    """
+    Pool de navegadores headless de larga duración.
+    Cada fetch toma un navegador libre (o crea uno si hay hueco),
+    carga la URL en su pestaña, espera al selector requerido y lo devuelve.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES_PER_DRIVER):
+        self.size = size
+        self.max_pages = max_pages
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._all = []
+
+    def _acquire(self):
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                crear = self._created < self.size
+                if crear:
+                    self._created += 1
+
+            if crear:
+                try:
+                    entry = {"driver": new_driver(), "pages": 0}
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+                with self._lock:
+                    self._all.append(entry)
+                return entry
+
+            # Pool lleno: esperar a que se libere uno (o a que se descarte alguno)
+            try:
+                return self._idle.get(timeout=1)
+            except queue.Empty:
+                continue
+
+    def _discard(self, entry):
+        with self._lock:
+            self._created -= 1
+            if entry in self._all:
+                self._all.remove(entry)
+        try:
+            entry["driver"].quit()
+        except Exception:
+            pass
+
+    def _release(self, entry):
+        if entry["pages"] >= self.max_pages:
+            self._discard(entry)
+            return
+
+        # Reciclar la pestaña: cerrar las extra y dejar la principal en blanco
+        driver = entry["driver"]
+        try:
+            handles = driver.window_handles
+            for h in handles[1:]:
+                driver.switch_to.window(h)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.get("about:blank")
+        except WebDriverException:
+            self._discard(entry)
+            return
+
+        self._idle.put(entry)
+
+    def fetch(self, url, wait_class=None, timeout=WAIT_TIMEOUT):
+        """
+        Devuelve el HTML renderizado de `url`.
+        Si se pasa `wait_class`, espera explícitamente a que exista un
+        elemento con esa clase (en vez de un sleep fijo).
+        """
+        entry = self._acquire()
+        driver = entry["driver"]
+        try:
+            driver.get(url)
+            entry["pages"] += 1
+            try:
+                if wait_class:
+                    WebDriverWait(driver, timeout).until(
+                        EC.presence_of_element_located((By.CLASS_NAME, wait_class))
+                    )
+                else:
+                    WebDriverWait(driver, timeout).until(
+                        lambda d: d.execute_script("return document.readyState") == "complete"
+                    )
+            except TimeoutException:
+                print(f"[chrome_pool] Timeout esperando '{wait_class or 'readyState'}' en {url}")
+            html = driver.page_source
+        except WebDriverException as e:
+            print(f"[chrome_pool] Navegador caído en {url}: {e}")
+            self._discard(entry)
+            return None
+
+        self._release(entry)
+        return html
+
+    def close(self):
+        with self._lock:
+            entries = list(self._all)
+            self._all.clear()
+            self._created = 0
+        while not self._idle.empty():
+            self._idle.get_nowait()
+        for entry in entries:
+            try:
+                entry["driver"].quit()
+            except Exception:
+                pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Pool compartido por todo el proceso (se cierra al salir)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ChromePool()
+            atexit.register(_pool.close)
+        return _pool
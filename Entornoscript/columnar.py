@@ -0,0 +1,113 @@
+###############################################
+# FORMATO COLUMNAR OPCIONAL (PARQUET)
+# DATA_FORMAT=parquet: los datasets se guardan y leen como
+# Parquet con esquema explícito (flags int8, equipos como
+# categoría, estadísticas float32) en lugar de CSV.
+# Necesita pyarrow; sin DATA_FORMAT todo sigue en CSV.
+###############################################
+
+import os
+
+import pandas as pd
+
+DATA_FORMAT = os.environ.get("DATA_FORMAT", "csv").lower()   # "csv" o "parquet"
+PARQUET_EXT = ".parquet"
+PARQUET_COMPRESSION = os.environ.get("PARQUET_COMPRESSION", "zstd")
+
+FLAG = "int8"
+TEAM = "category"
+STAT = "float32"
+
+# Datasets del scraper: solo se fijan las columnas que no son texto libre
+SCHEMAS = {
+    "resultados_partidos": {"local": TEAM, "visitante": TEAM},
+    "team_stats": {"local": TEAM, "visitante": TEAM, "stat": "category",
+                   "valor_local": STAT, "valor_visitante": STAT},
+    "players_stats": {"equipo": TEAM, "minutos_totales": "int32",
+                      "goles_totales": "int16", "partidos_jugados": "int16"},
+    "apariciones": {"equipo": TEAM, "titular": FLAG, "minuto_entrada": "Int16",
+                    "minuto_salida": "Int16", "minutos": "int16", "goles": "int8"},
+}
+
+# Tablas equipo-jornada de convertidordatos.py: el resto de columnas son estadísticas
+EQUIPOS_DATASETS = {"dfequipos", "dfequiposracha", "equipos_jornadas", "equipos_jornadasracha"}
+EQUIPOS_FLAGS = {"es_visitante", "Localía", "victoria", "empate", "derrota"}
+EQUIPOS_CONTADORES = {"jornada", "goles_marcados", "goles_encajados", "partidos_jugados"}
+
+
+def nombre_dataset(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def esquema_equipos(columns):
+    out = {}
+    for c in columns:
+        if c == "equipo":
+            out[c] = TEAM
+        elif c == "resultado":
+            out[c] = "category"
+        elif c in EQUIPOS_FLAGS:
+            out[c] = FLAG
+        elif c in EQUIPOS_CONTADORES or c.endswith("_tot"):
+            out[c] = "int16"
+        else:
+            out[c] = STAT
+    return out
+
+
+def esquema(nombre, columns):
+    """dtype por columna del dataset `nombre` ({} si no tiene esquema propio)."""
+    if nombre in EQUIPOS_DATASETS:
+        return esquema_equipos(columns)
+    return {c: t for c, t in SCHEMAS.get(nombre, {}).items() if c in columns}
+
+
+def aplicar_esquema(df, nombre):
+    return df.astype(esquema(nombre, df.columns))
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("DATA_FORMAT=parquet necesita pyarrow (pip install pyarrow)")
+    return pa, pq
+
+
+def ruta_dataset(path):
+    """'./team_stats.csv' -> './team_stats.parquet' con DATA_FORMAT=parquet."""
+    if DATA_FORMAT == "parquet":
+        return os.path.splitext(path)[0] + PARQUET_EXT
+    return path
+
+
+def write_parquet(df, path, nombre=None):
+    """Parquet con el esquema del dataset, escrito de forma atómica."""
+    pa, pq = _pyarrow()
+    tabla = pa.Table.from_pandas(aplicar_esquema(df, nombre or nombre_dataset(path)), preserve_index=False)
+    tmp = path + ".tmp"
+    pq.write_table(tabla, tmp, compression=PARQUET_COMPRESSION)
+    os.replace(tmp, path)
+
+
+def read_parquet(path, columns=None):
+    """Lee un Parquet (solo `columns` si se indican); categorías y dtypes se conservan."""
+    _, pq = _pyarrow()
+    return pq.read_table(path, columns=columns).to_pandas()
+
+
+def guardar_dataset(df, path):
+    """Guarda en el formato de DATA_FORMAT; `path` es siempre el nombre .csv."""
+    if DATA_FORMAT == "parquet":
+        write_parquet(df, ruta_dataset(path), nombre_dataset(path))
+    else:
+        df.to_csv(path, index=False)
+
+
+def leer_dataset(path, **read_csv):
+    """Lee el Parquet equivalente si DATA_FORMAT=parquet y existe; si no, el CSV."""
+    ruta = ruta_dataset(path)
+    if ruta != path and os.path.exists(ruta):
+        return read_parquet(ruta)
+    return pd.read_csv(path, **read_csv)
@@ -2,6 +2,14 @@ import pandas as pd
 import numpy as np
 import os
 
+from staging import abrir_staging, leer_tabla, escribir_tablas
+from rutas import TEMPORADA, dir_temporada
+
+# Ventana de las columnas _racha (las de dfequiposracha y el importador) y
+# ventanas extra, que salen como _racha3, _racha10... en equipos_jornadasracha
+RACHA_N = 5
+RACHA_EXTRA = [int(n) for n in os.environ.get("RACHA_EXTRA", "3,10").split(",") if n.strip()]
+
 
 # =========================================
 #   FUNCIONES AUXILIARES
@@ -22,38 +30,87 @@ def resultado_partido(row):
         return "E"
 
 
-def agregar_rachas(df, stats_cols, N=3):
+def medias_previas(df, cols, ventanas=(), grupo="equipo"):
+    """
+    Medias de los partidos anteriores de cada equipo para todas las columnas
+    a la vez: la acumulada ("pp", como shift().expanding().mean()) y la de
+    los últimos N partidos para cada N de `ventanas` (como
+    shift().rolling(N, min_periods=1).mean()). Un shift y una ventana por
+    grupo sobre todo el bloque de columnas (kernels de pandas, mismos
+    resultados) en lugar de un lambda por columna y ventana.
+    Devuelve {"pp": DataFrame, N: DataFrame, ...} con las columnas `cols`.
+    """
+    valores = df[cols].apply(pd.to_numeric, errors="coerce").astype(float)
+    claves = df[grupo]
+    previos = valores.groupby(claves, sort=False).shift().groupby(claves, sort=False)
+
+    def por_fila(ventana):
+        return ventana.mean().droplevel(0).reindex(df.index)
+
+    medias = {"pp": por_fila(previos.expanding())}
+    for N in ventanas:
+        medias[N] = por_fila(previos.rolling(window=N, min_periods=1))
+    return medias
+
+
+def agregar_rachas(df, medias, stats_cols, N=RACHA_N, extra=()):
     """
-    Añade columnas de racha (media de los últimos N partidos) para cada estadística.
+    Añade columnas de racha (media de los últimos N partidos) para cada
+    estadística, y _racha<M> para cada ventana extra M, desde medias_previas.
     """
     df = df.copy()
 
     for col in stats_cols:
         df[col] = pd.to_numeric(df[col], errors="coerce")
+        df[f"{col}_racha"] = medias[N][col]
 
-        df[f"{col}_racha"] = (
-            df.groupby("equipo")[col]
-            .transform(lambda x: x.shift().rolling(window=N, min_periods=1).mean())
-        )
+    for M in extra:
+        for col in stats_cols:
+            df[f"{col}_racha{M}"] = medias[M][col]
 
     return df
 
 
-# =========================================
-#   MAIN SCRIPT
-# =========================================
-def main():
+def stats_por_equipo(equipos_jornadas, stats_pivot, cols_local, cols_visitante):
+    """
+    Estadísticas del partido de cada fila equipo–jornada con los nombres
+    _local: las columnas _local si jugó en casa, las _visitante si no.
+    Cruce por (jornada, equipo) con melt + merge en lugar de filtrar
+    stats_pivot fila a fila. Como antes, cuenta el primer partido de la
+    jornada en el que aparece el equipo; sin partido, todo vacío.
+    """
+    claves = (
+        stats_pivot[["jornada", "local", "visitante"]]
+        .reset_index(names="fila")
+        .melt(id_vars=["fila", "jornada"], value_vars=["local", "visitante"], value_name="equipo")
+        .sort_values("fila", kind="stable")
+        .drop_duplicates(["jornada", "equipo"])
+    )
+    fila = equipos_jornadas[["jornada", "equipo"]].merge(
+        claves[["jornada", "equipo", "fila"]], on=["jornada", "equipo"], how="left"
+    )["fila"].to_numpy()
+
+    datos = np.full((len(equipos_jornadas), len(cols_local)), np.nan)
+    tiene = ~pd.isna(fila)
+    if tiene.any():
+        idx = fila[tiene].astype(int)
+        visitante = equipos_jornadas["es_visitante"].to_numpy()[tiene] == 1
+        datos[tiene] = np.where(
+            visitante[:, None],
+            stats_pivot[cols_visitante].to_numpy(dtype=float)[idx],
+            stats_pivot[cols_local].to_numpy(dtype=float)[idx],
+        )
+    return pd.DataFrame(datos, index=equipos_jornadas.index, columns=cols_local)
 
-    ruta = "./"
-    os.makedirs(ruta, exist_ok=True)
-
-    # ============================
-    # 1. Cargar data
-    # ============================
-    players = pd.read_csv(ruta + "players_stats.csv")
-    resultados = pd.read_csv(ruta + "resultados_partidos.csv")
-    stats = pd.read_csv(ruta + "team_stats.csv")
 
+# =========================================
+#   CONVERSIÓN
+# =========================================
+def convertir(resultados, stats):
+    """
+    Tablas equipo–jornada (pasos 1.5 a 10) a partir de resultados_partidos
+    y team_stats. Devuelve {nombre: DataFrame} listo para guardar.
+    """
     # ============================
     # 1.5 Eliminar partidos no jugados
     # ============================
@@ -91,12 +148,14 @@ def main():
         index=["jornada", "local", "visitante"],
         columns="stat",
         values="valor_local",
+        observed=True,
     ).add_suffix("_local")
 
     stats_visit = stats.pivot_table(
         index=["jornada", "local", "visitante"],
         columns="stat",
         values="valor_visitante",
+        observed=True,
     ).add_suffix("_visitante")
 
     stats_pivot = pd.concat([stats_local, stats_visit], axis=1).reset_index()
@@ -213,50 +272,27 @@ def main():
         c.replace("_local", "_visitante") for c in stats_cols_local
     ]
 
-    def obtener_stats(row):
-        jornada = row["jornada"]
-        equipo = row["equipo"]
-        es_visitante = row["es_visitante"]
-
-        partido = stats_pivot[
-            (stats_pivot["jornada"] == jornada)
-            & (
-                (stats_pivot["local"] == equipo)
-                | (stats_pivot["visitante"] == equipo)
-            )
-        ]
-
-        if partido.empty:
-            return pd.Series({col: None for col in stats_cols_local})
-
-        partido = partido.iloc[0]
-
-        if es_visitante == 1:
-            datos = partido[stats_cols_visitante]
-            datos.index = stats_cols_local
-        else:
-            datos = partido[stats_cols_local]
-
-        return datos
-
-    equipos_stats = equipos_jornadas.apply(obtener_stats, axis=1)
+    equipos_stats = stats_por_equipo(
+        equipos_jornadas, stats_pivot, stats_cols_local, stats_cols_visitante
+    )
     equipos_jornadas = pd.concat([equipos_jornadas, equipos_stats], axis=1)
 
     # ============================
-    # 7. Promedios acumulados de stats
+    # 7. Promedios acumulados de stats (y medias de las rachas, en la misma pasada)
     # ============================
     cols_promedio = stats_cols_local
+    cols_resultado = ["goles_marcados", "goles_encajados", "victoria", "empate", "derrota"]
+    ventanas = [RACHA_N] + [M for M in RACHA_EXTRA if M != RACHA_N]
 
     for col in cols_promedio:
         equipos_jornadas[col] = pd.to_numeric(
             equipos_jornadas[col], errors="coerce"
         )
 
+    medias = medias_previas(equipos_jornadas, cols_resultado + cols_promedio, ventanas)
+
     for col in cols_promedio:
-        equipos_jornadas[f"{col}_pp"] = (
-            equipos_jornadas.groupby("equipo")[col]
-            .transform(lambda s: s.shift().expanding().mean())
-        )
+        equipos_jornadas[f"{col}_pp"] = medias["pp"][col]
 
     # ============================
     # 8. Renombrar columnas
@@ -268,6 +304,7 @@ def main():
     cols = stats_cols_local + [c + "_pp" for c in stats_cols_local]
     nuevas = [c.replace("_local_pp", "_pp").replace("_local", "") for c in cols]
     equipos_jornadas.rename(columns=dict(zip(cols, nuevas)), inplace=True)
+    medias = {k: m.rename(columns=dict(zip(cols, nuevas))) for k, m in medias.items()}
 
     # ============================
     # 9. dfequipos
@@ -299,7 +336,7 @@ def main():
     ]
 
     equipos_jornadasracha = agregar_rachas(
-        equipos_jornadas, stats_cols_racha, N=5
+        equipos_jornadas, medias, stats_cols_racha, N=RACHA_N, extra=ventanas[1:]
     )
 
     columnas_seleccionadas = np.r_[0:2, 14:19, 31:58]
@@ -307,16 +344,40 @@ def main():
         :, columnas_seleccionadas
     ].copy()
     #s
+    return {
+        "dfequipos": dfequipos,
+        "equipos_jornadas": equipos_jornadas,
+        "equipos_jornadasracha": equipos_jornadasracha,
+        "dfequiposracha": dfequiposracha,
+    }
+
+
+# =========================================
+#   MAIN SCRIPT
+# =========================================
+def main():
+
+    # Staging SQLite (STAGING_DB) si está definido; si no, los ficheros de la
+    # temporada (CSV, o Parquet con DATA_FORMAT=parquet; ver rutas.py)
+    store = abrir_staging(temporada=TEMPORADA)
+
     # ============================
-    # 11. GUARDAR CSV
+    # 1. Cargar data
     # ============================
-    dfequipos.to_csv(ruta + "dfequipos.csv", index=False)
-    equipos_jornadas.to_csv(ruta + "equipos_jornadas.csv", index=False)
+    players = leer_tabla(store, "players_stats.csv", TEMPORADA)
+    resultados = leer_tabla(store, "resultados_partidos.csv", TEMPORADA)
+    stats = leer_tabla(store, "team_stats.csv", TEMPORADA)
+
+    tablas = convertir(resultados, stats)
 
-    equipos_jornadasracha.to_csv(ruta + "equipos_jornadasracha.csv", index=False)
-    dfequiposracha.to_csv(ruta + "dfequiposracha.csv", index=False)
+    # ============================
+    # 11. GUARDAR (staging y/o ficheros, por jornada con DATA_DIR)
+    # ============================
+    escribir_tablas(store, tablas, TEMPORADA, por_jornada=True)
+    if store is not None:
+        store.close()
 
-    print("Archivos generados correctamente en ./24-25/")
+    print(f"Archivos generados correctamente en {dir_temporada(TEMPORADA)}/")
 
 
 if __name__ == "__main__":
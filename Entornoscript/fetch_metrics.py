@@ -0,0 +1,222 @@
+###############################################
+# MÉTRICAS DE DESCARGA
+# Latencia, bytes, status, caché, fallbacks y reintentos
+# por petición; al final del run -> JSON + textfile Prometheus
+###############################################
+
+import bisect
+import json
+import os
+import threading
+import time
+
+from fetch_strategy import url_class
+
+METRICS_JSON = os.environ.get("METRICS_JSON", "run_metrics.json")
+METRICS_PROM = os.environ.get("METRICS_PROM", "scraper_metrics.prom")
+
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]       # segundos
+BYTES_BUCKETS = [10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000]
+SLOWEST_KEPT = 20
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # último = +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        acc, out = 0, []
+        for c in self.counts:
+            acc += c
+            out.append(acc)
+        return out
+
+    def to_dict(self):
+        cum = self.cumulative()
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "mean": round(self.sum / self.count, 4) if self.count else None,
+            "buckets": {str(b): cum[i] for i, b in enumerate(self.buckets)} | {"+Inf": cum[-1]},
+        }
+
+
+class FetchMetrics:
+    """
+    Agregador thread-safe.
+    - record_http: cada intento HTTP (status, latencia, bytes por tipo de página)
+    - record_selenium: cada carga con Chrome (latencia, ok/fail por tipo de página)
+    - record_fetch: cada llamada completa a fetch_html (caché, backend,
+      motivo de fallback, reintentos)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.fetch_latency = {}       # (page, backend) -> Histogram
+        self.fetch_bytes = {}         # page -> Histogram
+        self.http_bytes = {}          # page -> Histogram (respuestas HTTP, reintentos incluidos)
+        self.http_latency = Histogram(LATENCY_BUCKETS)
+        self.selenium_latency = Histogram(LATENCY_BUCKETS)
+        self.http_status = {}         # status -> n (solo HTTP)
+        self.selenium_loads = {}      # (page, ok/fail) -> n
+        self.cache = {}               # hit/miss/revalidated/stale/off -> n
+        self.fallbacks = {}           # motivo -> n
+        self.retries = 0
+        self.fetches = 0
+        self.failures = 0
+        self.slowest = []             # [(latencia, url, backend)]
+
+    @staticmethod
+    def _inc(d, key, n=1):
+        d[key] = d.get(key, 0) + n
+
+    @staticmethod
+    def _page(url):
+        return url_class(url).split("|", 1)[1]
+
+    def record_http(self, url, status, latency, nbytes):
+        page = self._page(url)
+        with self._lock:
+            self.http_latency.observe(latency)
+            self._inc(self.http_status, str(status))
+            if status != "error":      # sin respuesta no hay cuerpo que medir
+                self.http_bytes.setdefault(page, Histogram(BYTES_BUCKETS)).observe(nbytes)
+
+    def record_selenium(self, url, latency, ok):
+        page = self._page(url)
+        with self._lock:
+            self.selenium_latency.observe(latency)
+            self._inc(self.selenium_loads, (page, "ok" if ok else "fail"))
+
+    def record_fetch(self, url, latency, html, info):
+        page = self._page(url)
+        backend = info.get("backend", "none")
+        nbytes = len(html.encode("utf-8")) if html else 0
+
+        with self._lock:
+            self.fetches += 1
+            if not html:
+                self.failures += 1
+            self.fetch_latency.setdefault((page, backend), Histogram(LATENCY_BUCKETS)).observe(latency)
+            self.fetch_bytes.setdefault(page, Histogram(BYTES_BUCKETS)).observe(nbytes)
+            self._inc(self.cache, info.get("cache", "off"))
+            if info.get("fallback"):
+                self._inc(self.fallbacks, info["fallback"])
+            self.retries += info.get("retries", 0)
+
+            if len(self.slowest) < SLOWEST_KEPT or latency > self.slowest[0][0]:
+                bisect.insort(self.slowest, (latency, url, backend))
+                if len(self.slowest) > SLOWEST_KEPT:
+                    self.slowest.pop(0)
+
+    # ---------- export ----------
+
+    def report(self):
+        with self._lock:
+            return {
+                "inicio": self.started,
+                "duracion_s": round(time.time() - self.started, 3),
+                "fetches": self.fetches,
+                "fallidos": self.failures,
+                "reintentos": self.retries,
+                "http_status": dict(self.http_status),
+                "selenium": {f"{p}|{r}": n for (p, r), n in sorted(self.selenium_loads.items())},
+                "cache": dict(self.cache),
+                "fallbacks_selenium": dict(self.fallbacks),
+                "latencia_http": self.http_latency.to_dict(),
+                "latencia_selenium": self.selenium_latency.to_dict(),
+                "latencia_fetch": {f"{p}|{b}": h.to_dict() for (p, b), h in self.fetch_latency.items()},
+                "bytes_fetch": {p: h.to_dict() for p, h in self.fetch_bytes.items()},
+                "bytes_http": {p: h.to_dict() for p, h in self.http_bytes.items()},
+                "mas_lentas": [
+                    {"url": u, "backend": b, "latencia_s": round(l, 3)}
+                    for l, u, b in reversed(self.slowest)
+                ],
+            }
+
+    def prometheus(self):
+        lines = []
+
+        def hist(name, h, labels=""):
+            sep = "," if labels else ""
+            sel = f"{{{labels}}}" if labels else ""
+            cum = h.cumulative()
+            for i, b in enumerate(h.buckets):
+                lines.append(f'{name}_bucket{{{labels}{sep}le="{b}"}} {cum[i]}')
+            lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {cum[-1]}')
+            lines.append(f"{name}_sum{sel} {h.sum}")
+            lines.append(f"{name}_count{sel} {h.count}")
+
+        with self._lock:
+            lines.append("# HELP scraper_fetch_duration_seconds Duración de fetch_html por tipo de página y backend")
+            lines.append("# TYPE scraper_fetch_duration_seconds histogram")
+            for (page, backend), h in sorted(self.fetch_latency.items()):
+                hist("scraper_fetch_duration_seconds", h, f'page="{page}",backend="{backend}"')
+
+            lines.append("# HELP scraper_fetch_bytes Tamaño del HTML devuelto por tipo de página")
+            lines.append("# TYPE scraper_fetch_bytes histogram")
+            for page, h in sorted(self.fetch_bytes.items()):
+                hist("scraper_fetch_bytes", h, f'page="{page}"')
+
+            lines.append("# HELP scraper_http_response_bytes Tamaño de cada respuesta HTTP por tipo de página")
+            lines.append("# TYPE scraper_http_response_bytes histogram")
+            for page, h in sorted(self.http_bytes.items()):
+                hist("scraper_http_response_bytes", h, f'page="{page}"')
+
+            lines.append("# HELP scraper_http_request_duration_seconds Duración de cada intento HTTP")
+            lines.append("# TYPE scraper_http_request_duration_seconds histogram")
+            hist("scraper_http_request_duration_seconds", self.http_latency)
+
+            lines.append("# HELP scraper_selenium_duration_seconds Duración de cada carga con Selenium")
+            lines.append("# TYPE scraper_selenium_duration_seconds histogram")
+            hist("scraper_selenium_duration_seconds", self.selenium_latency)
+
+            lines.append("# TYPE scraper_http_responses_total counter")
+            for status, n in sorted(self.http_status.items()):
+                lines.append(f'scraper_http_responses_total{{status="{status}"}} {n}')
+
+            lines.append("# TYPE scraper_selenium_loads_total counter")
+            for (page, result), n in sorted(self.selenium_loads.items()):
+                lines.append(f'scraper_selenium_loads_total{{page="{page}",result="{result}"}} {n}')
+
+            lines.append("# TYPE scraper_cache_lookups_total counter")
+            for result, n in sorted(self.cache.items()):
+                lines.append(f'scraper_cache_lookups_total{{result="{result}"}} {n}')
+
+            lines.append("# TYPE scraper_selenium_fallbacks_total counter")
+            for reason, n in sorted(self.fallbacks.items()):
+                lines.append(f'scraper_selenium_fallbacks_total{{reason="{reason}"}} {n}')
+
+            lines.append("# TYPE scraper_http_retries_total counter")
+            lines.append(f"scraper_http_retries_total {self.retries}")
+            lines.append("# TYPE scraper_fetch_failures_total counter")
+            lines.append(f"scraper_fetch_failures_total {self.failures}")
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, json_path=METRICS_JSON, prom_path=METRICS_PROM):
+        for path, content in ((json_path, json.dumps(self.report(), indent=2, ensure_ascii=False)),
+                              (prom_path, self.prometheus())):
+            if not path:
+                continue
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp, path)
+        print(f"[metrics] {self.fetches} descargas -> {json_path}, {prom_path}")
+
+
+_metrics = FetchMetrics()
+
+
+def get_metrics():
+    return _metrics
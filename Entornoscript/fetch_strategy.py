@@ -0,0 +1,143 @@
+###############################################
+# ESTRATEGIA DE DESCARGA APRENDIDA POR TIPO DE URL
+# Recuerda si una clase de página (calendario, lineup,
+# team-statistics) necesita JS y va directa al backend bueno
+###############################################
+
+import atexit
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlparse
+
+STRATEGY_FILE = os.environ.get("FETCH_STRATEGY_FILE", "fetch_strategy.json")
+
+LEARN_AFTER = 2          # fallos seguidos de requests (sin marcador) para pasar a Selenium
+REPROBE_EVERY = 25       # cada N descargas con Selenium se vuelve a probar requests
+REPROBE_SECONDS = 24 * 3600   # ... o si la última prueba es más antigua que esto
+SAVE_EVERY = 20          # registros entre guardados en disco
+
+URL_CLASSES = [
+    ("season", re.compile(r"/all-matches/")),
+    ("lineup", re.compile(r"/match-report/.*/lineup/")),
+    ("team-statistics", re.compile(r"/match-report/.*/team-statistics/")),
+]
+
+
+def url_class(url):
+    """Clave de la clase de URL: '<host>|<tipo>'."""
+    host = urlparse(url).netloc
+    for name, pattern in URL_CLASSES:
+        if pattern.search(url):
+            return f"{host}|{name}"
+    return f"{host}|other"
+
+
+class FetchStrategy:
+    """
+    Registro persistente por clase de URL:
+    {'backend': 'requests'|'selenium', 'miss_streak', 'since_probe',
+     'last_probe', 'requests_ok', 'requests_miss', 'selenium_ok', 'selenium_miss'}
+    """
+
+    def __init__(self, path=STRATEGY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._dirty = 0
+        self.classes = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self.classes = json.load(f)
+            except (OSError, ValueError):
+                print(f"[fetch_strategy] {path} ilegible, se empieza de cero")
+
+    def _entry(self, key):
+        return self.classes.setdefault(key, {
+            "backend": "requests",
+            "miss_streak": 0,
+            "since_probe": 0,
+            "last_probe": 0,
+            "requests_ok": 0,
+            "requests_miss": 0,
+            "selenium_ok": 0,
+            "selenium_miss": 0,
+        })
+
+    def choose(self, url):
+        """Backend a usar para `url`: 'requests' o 'selenium'."""
+        key = url_class(url)
+        with self._lock:
+            e = self._entry(key)
+            if e["backend"] != "selenium":
+                return "requests"
+
+            e["since_probe"] += 1
+            if (e["since_probe"] >= REPROBE_EVERY
+                    or time.time() - e["last_probe"] > REPROBE_SECONDS):
+                e["since_probe"] = 0
+                e["last_probe"] = time.time()
+                print(f"[fetch_strategy] Re-probando requests para {key}")
+                return "requests"
+            return "selenium"
+
+    def record(self, url, backend, ok):
+        """
+        Registra el resultado de una descarga.
+        `ok` = se obtuvo HTML con el marcador requerido.
+        """
+        key = url_class(url)
+        with self._lock:
+            e = self._entry(key)
+            e[f"{backend}_{'ok' if ok else 'miss'}"] += 1
+
+            if backend == "requests":
+                if ok:
+                    if e["backend"] != "requests":
+                        print(f"[fetch_strategy] {key}: requests vuelve a funcionar")
+                        self._dirty = SAVE_EVERY
+                    e["backend"] = "requests"
+                    e["miss_streak"] = 0
+                else:
+                    e["miss_streak"] += 1
+                    if e["backend"] != "selenium" and e["miss_streak"] >= LEARN_AFTER:
+                        print(f"[fetch_strategy] {key}: necesita JS, se usará Selenium directamente")
+                        e["backend"] = "selenium"
+                        e["since_probe"] = 0
+                        e["last_probe"] = time.time()
+                        self._dirty = SAVE_EVERY
+
+            self._dirty += 1
+            if self._dirty >= SAVE_EVERY:
+                self._save_locked()
+
+    def _save_locked(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"     # varias temporadas en paralelo
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.classes, f, indent=2)
+            os.replace(tmp, self.path)
+            self._dirty = 0
+        except OSError as e:
+            print(f"[fetch_strategy] No se pudo guardar {self.path}: {e}")
+
+    def save(self):
+        with self._lock:
+            if self._dirty:
+                self._save_locked()
+
+
+_strategy = None
+_strategy_lock = threading.Lock()
+
+
+def get_strategy():
+    """Registro compartido del proceso (se guarda al salir)."""
+    global _strategy
+    with _strategy_lock:
+        if _strategy is None:
+            _strategy = FetchStrategy()
+            atexit.register(_strategy.save)
+        return _strategy
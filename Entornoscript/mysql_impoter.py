@@ -3,10 +3,15 @@ from sqlalchemy import create_engine
 import unicodedata
 import re
 import sys
+import os
+
+from staging import abrir_staging
+from rutas import leer
 
 #Control de temporada
 
 TEMPORADA = "25-26"
+TEMPORADA = os.environ.get("TEMPORADA", TEMPORADA)
 
 # ============================================================
 # 1. CONFIG MYSQL — AJUSTA ESTO
@@ -49,16 +54,29 @@ def normalize_df(df):
 # ============================================================
 
 def load_csv(path):
-    df = pd.read_csv(path, encoding="utf-8-sig")
+    # Resuelto con rutas.py: ./path o DATA_DIR/temporada=<TEMPORADA>/path
+    # (o sus particiones por jornada); .parquet con DATA_FORMAT=parquet
+    df = leer(path, TEMPORADA, encoding="utf-8-sig")
     return normalize_df(df)
 
-print("📂 Leyendo CSV...")
+# Staging SQLite (STAGING_DB) si está definido: tablas ya tipadas, sin parsear CSV
+store = abrir_staging(temporada=TEMPORADA)
+
+def load_tabla(nombre):
+    if store is not None:
+        return normalize_df(store.read_frame(nombre))
+    return load_csv(f"{nombre}.csv")
+
+print("📂 Leyendo CSV..." if store is None else f"📂 Leyendo staging {store.path}...")
+
+players = load_tabla("players_stats")
+team_stats = load_tabla("team_stats")
+resultados = load_tabla("resultados_partidos")
+dfequipos = load_tabla("dfequipos")
+dfequiposracha = load_tabla("dfequiposracha")
 
-players = load_csv("../24-25/players_stats.csv")
-team_stats = load_csv("../24-25/team_stats.csv")
-resultados = load_csv("../24-25/resultados_partidos.csv")
-dfequipos = load_csv("../24-25/dfequipos.csv")
-dfequiposracha = load_csv("../24-25/dfequiposracha.csv")
+if store is not None:
+    store.close()
 
 # ============================================================
 # 4. NORMALIZAR JORNADAS ("1. Jornada" → 1)
@@ -0,0 +1,230 @@
+###############################################
+# ARCHIVO DE PÁGINAS CRUDAS POR TEMPORADA
+# Un fichero append-only por temporada (cada página comprimida
+# por separado) + índice JSONL por URL e id de partido.
+# Permite re-parsear temporadas enteras sin tocar la red.
+#
+#   PAGE_ARCHIVE_DIR=archivo python scrapper_final.py        (archiva lo descargado)
+#   python page_archive.py reprocess --dir archivo --out reprocesado [--workers 4]
+#   (salida en el layout de rutas.py: reprocesado/temporada=<t>/...)
+###############################################
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fetch_strategy import url_class
+from rutas import temporada_de_url, ruta
+
+DATA_EXT = ".pages"
+INDEX_EXT = ".idx.jsonl"
+MATCH_ID_RE = re.compile(r"/(ma\d+)/")
+
+
+class PageArchive:
+    """
+    <temporada>.pages: registros gzip concatenados (uno por página).
+    <temporada>.idx.jsonl: una línea por registro con url, match_id, tipo,
+    offset y longitud. Si una URL se archiva varias veces, gana la última.
+    """
+
+    def __init__(self, path):
+        self.data_path = path + DATA_EXT
+        self.index_path = path + INDEX_EXT
+        self._lock = threading.Lock()
+        self.by_url = {}
+        self.by_match = {}      # (match_id, tipo) -> entrada
+        self.by_kind = {}       # tipo -> [entradas]
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._add(json.loads(line))
+                    except ValueError:
+                        # Última línea cortada por un corte del proceso
+                        continue
+
+    def _add(self, entry):
+        self.by_url[entry["url"]] = entry
+        if entry["match_id"]:
+            self.by_match[(entry["match_id"], entry["kind"])] = entry
+        self.by_kind.setdefault(entry["kind"], []).append(entry)
+
+    def append(self, url, html):
+        raw = html.encode("utf-8")
+        sha = hashlib.sha1(raw).hexdigest()
+        with self._lock:
+            prev = self.by_url.get(url)
+            if prev is not None and prev["sha1"] == sha:
+                return prev
+
+            blob = gzip.compress(raw)
+            with open(self.data_path, "ab") as f:
+                offset = f.seek(0, os.SEEK_END)
+                f.write(blob)
+
+            m = MATCH_ID_RE.search(url)
+            entry = {
+                "url": url,
+                "match_id": m.group(1) if m else None,
+                "kind": url_class(url).split("|", 1)[1],
+                "offset": offset,
+                "length": len(blob),
+                "sha1": sha,
+                "ts": time.time(),
+            }
+            # Primero los datos, luego el índice: una línea de índice nunca
+            # apunta a un registro incompleto
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._add(entry)
+            return entry
+
+    def read(self, entry):
+        return read_record(self.data_path, entry)
+
+    def season_page(self):
+        pages = self.by_kind.get("season")
+        return pages[-1] if pages else None
+
+    def match_page(self, match_id, kind):
+        return self.by_match.get((match_id, kind))
+
+
+def read_record(data_path, entry):
+    if entry is None:
+        return None
+    with open(data_path, "rb") as f:
+        f.seek(entry["offset"])
+        return gzip.decompress(f.read(entry["length"])).decode("utf-8")
+
+
+_archives = {}
+_archives_lock = threading.Lock()
+
+
+def get_archive(archive_dir, season_url):
+    path = os.path.join(archive_dir, temporada_de_url(season_url))
+    with _archives_lock:
+        if path not in _archives:
+            os.makedirs(archive_dir, exist_ok=True)
+            _archives[path] = PageArchive(path)
+        return _archives[path]
+
+
+def archive_page(archive_dir, season_url, url, html):
+    """Archiva una página descargada en el archivo de su temporada."""
+    get_archive(archive_dir, season_url).append(url, html)
+
+
+def list_seasons(archive_dir):
+    return sorted(n[:-len(INDEX_EXT)] for n in os.listdir(archive_dir) if n.endswith(INDEX_EXT))
+
+
+############################################################
+# REPROCESADO OFFLINE
+############################################################
+
+def _parsear_partido_archivado(data_path, p, lineup_entry, stats_entry):
+    """Trabajo de un proceso: lee lineup + estadísticas del archivo y las parsea."""
+    import scrapper_final as sf
+
+    lineup_html = read_record(data_path, lineup_entry)
+    stats_html = read_record(data_path, stats_entry)
+    filas = sf.apariciones_lineup_html(lineup_html) if lineup_html else []
+    stats = sf.parsear_team_statistics_html(stats_html, stats_entry["url"]) if stats_html else []
+    return sf.apariciones_partido(p, filas), sf.filas_team_stats(p, stats)
+
+
+def reprocess(archive_dir, out_dir, workers=None, seasons=None):
+    """
+    Vuelve a parsear todas las temporadas archivadas en paralelo y escribe
+    out_dir/temporada=<t>/{resultados_partidos,players_stats,team_stats,apariciones}.csv
+    """
+    import scrapper_final as sf
+    from player_stats import totales_temporada
+    from records import Match, PlayerAppearance, TeamStatRow, RecordTable
+
+    seasons = seasons or list_seasons(archive_dir)
+    jobs = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Se encolan todas las temporadas antes de recoger: los procesos no esperan
+        for temporada in seasons:
+            archive = PageArchive(os.path.join(archive_dir, temporada))
+            season = archive.season_page()
+            if season is None:
+                print(f"[reprocess] {temporada}: sin página de temporada, se omite")
+                continue
+
+            partidos = sf.parsear_partidos(archive.read(season))
+            jobs[temporada] = []
+            for p in partidos:
+                mid = sf.match_id(p["lineup_url"])
+                fut = None
+                if mid:
+                    fut = pool.submit(_parsear_partido_archivado, archive.data_path, p,
+                                      archive.match_page(mid, "lineup"),
+                                      archive.match_page(mid, "team-statistics"))
+                jobs[temporada].append((p, fut))
+
+        for temporada, partidos in jobs.items():
+            results_rows = RecordTable(Match)
+            team_stats_rows = RecordTable(TeamStatRow)
+            apariciones = RecordTable(PlayerAppearance)
+
+            for p, fut in partidos:
+                results_rows.append(sf.base_info_partido(p))
+                if fut is not None:
+                    aps, stats = fut.result()
+                    apariciones.extend(aps)
+                    team_stats_rows.extend(stats)
+
+            def dest(path):
+                return ruta(os.path.basename(path), temporada, root=out_dir)
+
+            os.makedirs(os.path.dirname(dest(sf.RESULTS_CSV)), exist_ok=True)
+            ap_df = apariciones.to_frame()
+            sf.safe_to_csv(results_rows.to_frame(), dest(sf.RESULTS_CSV))
+            sf.safe_to_csv(team_stats_rows.to_frame(), dest(sf.TEAM_STATS_CSV))
+            sf.safe_to_csv(ap_df, dest(sf.APPEARANCES_CSV))
+            sf.safe_to_csv(totales_temporada(ap_df), dest(sf.PLAYERS_CSV))
+            print(f"[reprocess] {temporada}: {len(results_rows)} partidos, "
+                  f"{len(apariciones)} apariciones -> {os.path.dirname(dest(sf.RESULTS_CSV))}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Archivo de páginas crudas y reprocesado offline")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("reprocess", help="regenera los CSV de cada temporada desde el archivo")
+    r.add_argument("--dir", required=True, help="directorio del archivo (PAGE_ARCHIVE_DIR)")
+    r.add_argument("--out", required=True)
+    r.add_argument("--workers", type=int)
+    r.add_argument("--season", action="append", help="temporada concreta, p.ej. 24-25 (repetible)")
+
+    ls = sub.add_parser("list", help="temporadas y páginas archivadas")
+    ls.add_argument("--dir", required=True)
+
+    args = ap.parse_args(argv)
+
+    if args.cmd == "list":
+        for temporada in list_seasons(args.dir):
+            archive = PageArchive(os.path.join(args.dir, temporada))
+            kinds = ", ".join(f"{k}={len(v)}" for k, v in sorted(archive.by_kind.items()))
+            print(f"{temporada}: {len(archive.by_url)} URLs ({kinds})")
+        return
+
+    t0 = time.perf_counter()
+    reprocess(args.dir, args.out, args.workers, args.season)
+    print(f"[reprocess] {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+###############################################
+# PARSING CON LXML
+# Árbol en C + extracción directa por XPath sobre el bloque
+# que interesa, con la misma semántica que BeautifulSoup.
+# Specs declarativos (Field / Spec) compilados al importar.
+###############################################
+
+import re
+
+from lxml import etree
+from lxml import html as lxml_html
+
+_PARSER = lxml_html.HTMLParser(encoding="utf-8")
+
+
+def parse_tree(doc):
+    """
+    Devuelve el árbol lxml de `doc` (HTML en str/bytes, o un árbol ya parseado).
+    Se parsea desde bytes para aceptar páginas con declaración de encoding.
+    """
+    if isinstance(doc, etree._Element):
+        return doc
+    if isinstance(doc, str):
+        doc = doc.encode("utf-8")
+    return lxml_html.fromstring(doc, parser=_PARSER)
+
+
+def xp_class(cls):
+    """Predicado XPath: el atributo class contiene el token `cls` (class_="x" en BS)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {cls} ')"
+
+
+def xp_class_exact(classes):
+    """Predicado XPath: class es exactamente "a b c" (class_="a b c" en BS)."""
+    return f"normalize-space(@class)='{classes}'"
+
+
+def xp_class_contains(fragment):
+    """Predicado XPath: algún token de class contiene `fragment` (class_=re.compile('x'))."""
+    return f"contains(@class, '{fragment}')"
+
+
+def first(el, xpath):
+    res = el.xpath(xpath)
+    return res[0] if res else None
+
+
+def classes_of(el):
+    return (el.get("class") or "").split()
+
+
+class ClassRe:
+    """
+    Selector equivalente a class_=re.compile(...) en BS: primer descendiente
+    `tag` cuyo class encaja (se prueba cada token y la cadena completa).
+    La regex se compila una vez, al declarar el selector.
+    """
+
+    def __init__(self, tag, pattern):
+        self.tag = tag
+        self.rx = re.compile(pattern)
+
+    def __call__(self, el):
+        for node in el.iterdescendants(self.tag):
+            cls = classes_of(node)
+            if any(self.rx.search(c) for c in cls) or (cls and self.rx.search(" ".join(cls))):
+                return [node]
+        return []
+
+
+def _strings(el):
+    # Solo texto de elementos (sin comentarios ni scripts), como get_text() en BS
+    if isinstance(el.tag, str) and el.tag not in ("script", "style", "template") and el.text:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str):
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def text(el):
+    """Equivalente a el.text / get_text() de BS."""
+    return "".join(_strings(el))
+
+
+def text_strip(el):
+    """Equivalente a get_text(strip=True) de BS."""
+    return "".join(s.strip() for s in _strings(el) if s.strip())
+
+
+def next_element(el):
+    """Siguiente hermano que sea etiqueta (ignora comentarios), como find_next_sibling()."""
+    nxt = el.getnext()
+    while nxt is not None and not isinstance(nxt.tag, str):
+        nxt = nxt.getnext()
+    return nxt
+
+
+############################################################
+# SPECS DE EXTRACCIÓN
+############################################################
+
+def _compile(selector):
+    return etree.XPath(selector) if isinstance(selector, str) else selector
+
+
+class Field:
+    """
+    Campo declarativo de un spec.
+    Uno o varios selectores (XPath compilado o ClassRe) que se prueban en
+    orden; del primer resultado se lee `get` y se aplica `coerce`.
+
+    get: 'text'  -> get_text(strip=True)
+         'raw'   -> get_text()
+         'node'  -> el propio elemento
+         'value' -> resultado de un XPath a atributo/cadena
+         '@attr' -> atributo del elemento
+         'count' -> XPath count(...)
+    many=True devuelve la lista de todos los resultados del primer selector.
+    """
+
+    def __init__(self, *selectors, get="text", coerce=None, default=None, many=False):
+        self.selectors = [_compile(s) for s in selectors]
+        self.get = get
+        self.coerce = coerce
+        self.default = default
+        self.many = many
+
+    def _read(self, res):
+        get = self.get
+        if get == "text":
+            value = text_strip(res)
+        elif get == "raw":
+            value = text(res)
+        elif get == "node":
+            value = res
+        elif get == "value":
+            value = str(res)
+        else:
+            value = res.get(get[1:])
+            if value is None:
+                return self.default
+        return self.coerce(value) if self.coerce else value
+
+    def __call__(self, node):
+        for sel in self.selectors:
+            res = sel(node)
+            if self.get == "count":
+                return int(res)
+            if res:
+                if self.many:
+                    return [self._read(r) for r in res]
+                return self._read(res[0])
+        return [] if self.many else self.default
+
+
+class Spec:
+    """
+    Spec de una página (o bloque): XPath de los nodos registro y los campos
+    que se leen de cada uno. Todo se compila al declararlo.
+    """
+
+    def __init__(self, records=None, **fields):
+        self.records = _compile(records) if records else None
+        self.fields = fields
+
+    def record(self, node):
+        return {name: f(node) for name, f in self.fields.items()}
+
+    def extract(self, root):
+        for node in self.records(root):
+            yield node, self.record(node)
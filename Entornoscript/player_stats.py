@@ -0,0 +1,120 @@
+###############################################
+# AGREGADOS DE JUGADORES A PARTIR DE apariciones.csv
+# Totales de temporada y forma por jornada con groupby
+# vectorizado, sin volver a descargar nada.
+# apariciones.csv es el log incremental (una escritura por
+# partido); players_stats.csv es su compactación.
+#
+#   python player_stats.py [--apariciones apariciones.csv]
+###############################################
+
+import argparse
+import os
+
+import pandas as pd
+
+from rutas import TEMPORADA, ruta
+
+APPEARANCES_CSV = "apariciones.csv"
+PLAYERS_CSV = "players_stats.csv"
+PLAYERS_BASE_CSV = "players_stats.base.csv"   # totales anteriores al log de apariciones
+FORM_CSV = "forma_jugadores.csv"
+TOTALS_COLUMNS = ["nombre", "equipo", "minutos_totales", "goles_totales", "partidos_jugados"]
+
+
+def load_apariciones(path=APPEARANCES_CSV):
+    """
+    Lee la tabla de apariciones. Las filas repetidas por un partido que se
+    volvió a procesar tras un corte se descartan.
+    """
+    df = pd.read_csv(path, dtype={"match_id": "string"})
+    return df.drop_duplicates(ignore_index=True)
+
+
+def totales_temporada(df):
+    """
+    Mismas columnas y orden que players_stats.csv (orden de primera aparición).
+    """
+    return (
+        df.assign(jugado=(df["minutos"] > 0).astype(int))
+          .groupby(["nombre", "equipo"], sort=False)
+          .agg(minutos_totales=("minutos", "sum"),
+               goles_totales=("goles", "sum"),
+               partidos_jugados=("jugado", "sum"))
+          .reset_index()
+    )
+
+
+def totales_desde_log(apariciones_path=APPEARANCES_CSV, base_path=PLAYERS_BASE_CSV, apariciones=None):
+    """
+    Totales de temporada = base (si la hay) + log de apariciones, en el
+    orden en que aparece cada jugador por primera vez. `apariciones`: el log
+    ya cargado (p.ej. desde el staging) en lugar de leer el CSV.
+    """
+    partes = []
+    if base_path and os.path.exists(base_path):
+        partes.append(pd.read_csv(base_path)[TOTALS_COLUMNS])
+    if apariciones is not None:
+        if len(apariciones):
+            partes.append(totales_temporada(apariciones))
+    elif os.path.exists(apariciones_path):
+        partes.append(totales_temporada(load_apariciones(apariciones_path)))
+    if not partes:
+        return pd.DataFrame(columns=TOTALS_COLUMNS)
+    if len(partes) == 1:
+        return partes[0]
+    return pd.concat(partes, ignore_index=True).groupby(["nombre", "equipo"], sort=False).sum().reset_index()
+
+
+def compactar(apariciones_path=APPEARANCES_CSV, base_path=PLAYERS_BASE_CSV, players_path=PLAYERS_CSV):
+    """Reescribe players_stats.csv desde el log (de forma atómica)."""
+    df = totales_desde_log(apariciones_path, base_path)
+    tmp = players_path + ".tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, players_path)
+    return df
+
+
+def forma_jornada(df):
+    """
+    Una fila por jugador y jornada: minutos, goles, titularidades y
+    acumulados de temporada hasta esa jornada.
+    """
+    df = df.assign(jornada_num=df["jornada"].str.extract(r"(\d+)", expand=False).astype("Int64"))
+    forma = (
+        df.groupby(["nombre", "equipo", "jornada_num"], sort=False)
+          .agg(jornada=("jornada", "first"),
+               minutos=("minutos", "sum"),
+               goles=("goles", "sum"),
+               titular=("titular", "max"))
+          .reset_index()
+          .sort_values(["nombre", "equipo", "jornada_num"], kind="stable", ignore_index=True)
+    )
+    g = forma.groupby(["nombre", "equipo"], sort=False)
+    forma["minutos_acum"] = g["minutos"].cumsum()
+    forma["goles_acum"] = g["goles"].cumsum()
+    forma["titularidades_acum"] = g["titular"].cumsum()
+    return forma
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Reagrega players_stats.csv desde apariciones.csv")
+    ap.add_argument("--temporada", default=TEMPORADA, help="con DATA_DIR, temporada a reagregar")
+    ap.add_argument("--apariciones")
+    ap.add_argument("--base")
+    ap.add_argument("--players")
+    ap.add_argument("--forma")
+    args = ap.parse_args(argv)
+    args.apariciones = args.apariciones or ruta(APPEARANCES_CSV, args.temporada)
+    args.base = args.base or ruta(PLAYERS_BASE_CSV, args.temporada)
+    args.players = args.players or ruta(PLAYERS_CSV, args.temporada)
+    args.forma = args.forma or ruta(FORM_CSV, args.temporada)
+
+    totales = compactar(args.apariciones, args.base, args.players)
+    df = load_apariciones(args.apariciones)
+    forma_jornada(df).to_csv(args.forma, index=False)
+    print(f"[player_stats] {len(df)} apariciones, {len(totales)} jugadores -> {args.players}, {args.forma}")
+
+
+if __name__ == "__main__":
+    main()
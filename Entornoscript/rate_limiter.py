@@ -0,0 +1,116 @@
+###############################################
+# RATE LIMITER ADAPTATIVO (token bucket por host)
+# Ajusta el ritmo según latencia y códigos de error,
+# respeta Retry-After y aplica backoff exponencial con jitter
+###############################################
+
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+RATE_INITIAL = float(os.environ.get("RATE_INITIAL", "2.0"))   # peticiones/segundo al empezar
+RATE_MIN = 0.2
+RATE_MAX = float(os.environ.get("RATE_MAX", "8.0"))
+BURST = 4                     # tokens acumulables como máximo
+
+FAST_LATENCY = 0.8            # s: por debajo se sube el ritmo
+SLOW_LATENCY = 3.0            # s: por encima se baja
+RATE_STEP = 0.25              # subida aditiva por respuesta rápida
+
+BACKOFF_BASE = 1.0            # s
+BACKOFF_MAX = 60.0            # s
+MAX_RETRIES = 4               # reintentos antes de pasar a Selenium
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket con control AIMD:
+    - respuesta rápida  -> rate += RATE_STEP
+    - respuesta lenta   -> rate *= 0.8
+    - error / 5xx       -> rate *= 0.75
+    - 429 / 503         -> rate *= 0.5 y bloqueo hasta Retry-After
+    Thread-safe: lo comparten el modo serie y los hilos del modo asyncio.
+    """
+
+    def __init__(self, rate=RATE_INITIAL, min_rate=RATE_MIN, max_rate=RATE_MAX, burst=BURST):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self._tokens = 1.0
+        self._last = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def acquire(self):
+        """Bloquea hasta que haya un token (y haya pasado cualquier Retry-After)."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def on_success(self, latency):
+        with self._lock:
+            if latency < FAST_LATENCY:
+                self.rate = min(self.max_rate, self.rate + RATE_STEP)
+            elif latency > SLOW_LATENCY:
+                self.rate = max(self.min_rate, self.rate * 0.8)
+
+    def on_error(self):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * 0.75)
+
+    def on_throttle(self, retry_after=None):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate * 0.5)
+            self._tokens = 0.0
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+
+def parse_retry_after(value):
+    """Retry-After en segundos (entero) o fecha HTTP. Devuelve segundos o None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        dt = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, dt.timestamp() - time.time())
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Backoff exponencial con jitter: mitad fija + mitad aleatoria."""
+    d = min(cap, base * (2 ** attempt))
+    return d / 2 + random.uniform(0, d / 2)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(url):
+    """Limitador compartido del host de `url`."""
+    host = urlparse(url).netloc
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = AdaptiveRateLimiter()
+        return _limiters[host]
@@ -0,0 +1,118 @@
+###############################################
+# TIPOS DE REGISTRO COMPACTOS
+# Partidos, apariciones de jugadores y estadísticas de equipo
+# como NamedTuple (sin __dict__ por fila) + contenedor por columnas
+###############################################
+
+from array import array
+from typing import NamedTuple, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+StatValue = Union[int, float, str, None]
+
+
+class Match(NamedTuple):
+    jornada: str
+    fecha: str
+    local: str
+    visitante: str
+    resultado: str
+    lineup_url: Optional[str]
+
+
+class PlayerAppearance(NamedTuple):
+    """Un jugador convocado en un partido (titular o suplente)."""
+    match_id: Optional[str]
+    jornada: str
+    nombre: str
+    equipo: str
+    titular: int
+    minuto_entrada: Optional[int]
+    minuto_salida: Optional[int]
+    minutos: int
+    goles: int
+
+
+class PlayerTotals(NamedTuple):
+    """Acumulado de temporada de un jugador (fila de players_stats.csv)."""
+    nombre: str
+    equipo: str
+    minutos: int
+    goles: int
+    partidos: int
+
+    @classmethod
+    def de_aparicion(cls, ap):
+        return cls(ap.nombre, ap.equipo, ap.minutos, ap.goles, 1 if ap.minutos > 0 else 0)
+
+    def sumar(self, other):
+        return self._replace(
+            minutos=self.minutos + other.minutos,
+            goles=self.goles + other.goles,
+            partidos=self.partidos + other.partidos,
+        )
+
+
+class TeamStatRow(NamedTuple):
+    jornada: str
+    fecha: str
+    local: str
+    visitante: str
+    stat: str
+    valor_local: StatValue
+    valor_visitante: StatValue
+
+
+class RecordTable:
+    """
+    Tabla por columnas de un tipo de registro: una lista por campo y un
+    array('q') para los campos int. Pasa a DataFrame / Arrow sin crear
+    un dict por fila (los Optional[int] salen como Int64 con nulos).
+    """
+
+    __slots__ = ("record_type", "columns")
+
+    def __init__(self, record_type, rows=()):
+        self.record_type = record_type
+        hints = record_type.__annotations__
+        self.columns = {
+            name: array("q") if hints.get(name) is int else []
+            for name in record_type._fields
+        }
+        self.extend(rows)
+
+    def append(self, rec):
+        for col, value in zip(self.columns.values(), rec):
+            col.append(value)
+
+    def extend(self, rows):
+        for rec in rows:
+            self.append(rec)
+
+    def __len__(self):
+        return len(next(iter(self.columns.values())))
+
+    def __iter__(self):
+        return map(self.record_type._make, zip(*self.columns.values()))
+
+    def to_frame(self):
+        hints = self.record_type.__annotations__
+        return pd.DataFrame({
+            name: np.array(col, dtype=np.int64) if isinstance(col, array)
+            else pd.array(col, dtype="Int64") if hints.get(name) == Optional[int]
+            else col
+            for name, col in self.columns.items()
+        })
+
+    def to_arrow(self):
+        """Tabla pyarrow (dependencia opcional)."""
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise RuntimeError("to_arrow necesita pyarrow (pip install pyarrow)")
+        return pa.table({
+            name: pa.array(np.array(col, dtype=np.int64) if isinstance(col, array) else col)
+            for name, col in self.columns.items()
+        })
@@ -0,0 +1,373 @@
+###############################################
+# GRABACIÓN + SERVIDOR DE REPLAY + BENCHMARK
+# Permite medir scrapper_final.py sin tocar livefutbol.com
+#
+#   python replay.py record --dir grabacion [--season-url URL]
+#   python replay.py serve  --dir grabacion [--port 8765 --latency 0.05 --error-rate 0.02]
+#   python replay.py bench  --dir grabacion [--latency 0.05 --error-rate 0.02 --mode async]
+###############################################
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+LIVE_ORIGIN = "https://www.livefutbol.com"
+INDEX_FILE = "index.jsonl"          # una línea {"path", "file"} por página grabada
+LEGACY_INDEX_FILE = "index.json"    # grabaciones antiguas: un único JSON path -> fichero
+
+_record_lock = threading.Lock()
+_index_abiertos = set()
+
+
+############################################################
+# GRABACIÓN
+############################################################
+
+def page_key(url):
+    """Clave de una página grabada: path + query (sin host)."""
+    u = urlparse(url)
+    return u.path + ("?" + u.query if u.query else "")
+
+
+def record_page(record_dir, url, html):
+    """
+    Guarda `html` en la grabación y añade una línea al índice path -> fichero
+    (append: O(1) por página en lugar de reescribir el índice entero).
+    """
+    key = page_key(url)
+    name = hashlib.sha1(key.encode("utf-8")).hexdigest() + ".html"
+    pages = os.path.join(record_dir, "pages")
+
+    with _record_lock:
+        os.makedirs(pages, exist_ok=True)
+        with open(os.path.join(pages, name), "w", encoding="utf-8") as f:
+            f.write(html)
+
+        index_path = os.path.join(record_dir, INDEX_FILE)
+        with open(index_path, "a", encoding="utf-8") as f:
+            if index_path not in _index_abiertos:
+                # Una grabación anterior cortada a mitad de línea: se cierra la línea
+                _index_abiertos.add(index_path)
+                if f.tell() and not _termina_en_salto(index_path):
+                    f.write("\n")
+            f.write(json.dumps({"path": key, "file": name}, ensure_ascii=False) + "\n")
+
+
+def _termina_en_salto(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def load_index(record_dir):
+    """Índice path -> fichero (si una página se grabó dos veces, vale la última)."""
+    index = {}
+    legacy = os.path.join(record_dir, LEGACY_INDEX_FILE)
+    if os.path.exists(legacy):
+        with open(legacy, "r", encoding="utf-8") as f:
+            index.update(json.load(f))
+
+    path = os.path.join(record_dir, INDEX_FILE)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue        # última línea cortada (grabación interrumpida)
+                index[rec["path"]] = rec["file"]
+    return index
+
+
+def record(record_dir, season_url=None):
+    """
+    Ejecuta el scraper completo contra el sitio real grabando cada página.
+    Corre en un directorio temporal para no pisar los CSV ni el checkpoint.
+    """
+    record_dir = os.path.abspath(record_dir)
+    env = dict(os.environ, RECORD_DIR=record_dir, HTML_CACHE_MODE="off")
+    if season_url:
+        env["SEASON_URL"] = season_url
+
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scrapper_final.py")
+    with tempfile.TemporaryDirectory() as work:
+        res = subprocess.run([sys.executable, script], cwd=work, env=env)
+    if res.returncode != 0:
+        raise RuntimeError("La grabación falló")
+
+    index = load_index(record_dir)
+    season_key = page_key(season_url or _season_url_default())
+    with open(os.path.join(record_dir, "season.json"), "w", encoding="utf-8") as f:
+        json.dump({"season_path": season_key}, f)
+    print(f"[record] {len(index)} páginas grabadas en {record_dir}")
+
+
+def _season_url_default():
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import scrapper_final
+    return scrapper_final.SEASON_URL
+
+
+############################################################
+# SERVIDOR DE REPLAY
+############################################################
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Sirve las páginas grabadas con latencia e inyección de errores configurables.
+    Las URL absolutas a livefutbol.com se reescriben a relativas para que
+    todo el crawl se quede en el servidor local.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, addr, record_dir, latency=0.0, jitter=0.0,
+                 error_rate=0.0, error_code=503, retry_after=1):
+        super().__init__(addr, ReplayHandler)
+        self.record_dir = record_dir
+        self.index = load_index(record_dir)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.retry_after = retry_after
+        self.requests = 0
+        self.errors = 0
+        self.not_found = 0
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def page(self, key):
+        if key not in self._cache:
+            name = self.index.get(key)
+            if name is None:
+                return None
+            with open(os.path.join(self.record_dir, "pages", name), "r", encoding="utf-8") as f:
+                self._cache[key] = f.read().replace(LIVE_ORIGIN, "").encode("utf-8")
+        return self._cache[key]
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        srv = self.server
+        with srv._lock:
+            srv.requests += 1
+
+        delay = srv.latency + random.uniform(-srv.jitter, srv.jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+        if srv.error_rate and random.random() < srv.error_rate:
+            with srv._lock:
+                srv.errors += 1
+            self.send_response(srv.error_code)
+            if srv.error_code in (429, 503):
+                self.send_header("Retry-After", str(srv.retry_after))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        body = srv.page(self.path)
+        if body is None:
+            with srv._lock:
+                srv.not_found += 1
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def start_server(record_dir, port=0, **opts):
+    """Arranca el servidor en un hilo. Devuelve (server, base_url)."""
+    server = ReplayServer(("127.0.0.1", port), record_dir, **opts)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+############################################################
+# BENCHMARK
+############################################################
+
+def _bench_child(stats_path):
+    """
+    Proceso hijo del benchmark: ejecuta scrapper_final.main() contando los
+    fallbacks a Selenium (que no se lanzan: el replay no ejecuta JS).
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import scrapper_final
+
+    selenium_calls = []
+
+    def fake_selenium(url, require=None):
+        selenium_calls.append(url)
+        return None
+
+    scrapper_final.fetch_with_selenium = fake_selenium
+
+    partidos = []
+    original = scrapper_final.iter_partidos
+
+    def contar_partidos(html):
+        for p in original(html):
+            partidos.append(p)
+            yield p
+
+    scrapper_final.iter_partidos = contar_partidos
+
+    t0 = time.perf_counter()
+    scrapper_final.main()
+    elapsed = time.perf_counter() - t0
+    scrapper_final.close_session()
+
+    with open(stats_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "elapsed": elapsed,
+            "matches": len(partidos),
+            "selenium_fallbacks": len(selenium_calls),
+        }, f)
+
+
+def bench(record_dir, mode="serie", concurrency=None, **server_opts):
+    record_dir = os.path.abspath(record_dir)
+    with open(os.path.join(record_dir, "season.json"), "r", encoding="utf-8") as f:
+        season_path = json.load(f)["season_path"]
+
+    server, base = start_server(record_dir, **server_opts)
+
+    with tempfile.TemporaryDirectory() as work:
+        stats_path = os.path.join(work, "bench_stats.json")
+        env = dict(
+            os.environ,
+            LIVEFUTBOL_BASE=base,
+            SEASON_URL=base + season_path,
+            HTML_CACHE_MODE="off",
+            FETCH_STRATEGY_FILE=os.path.join(work, "fetch_strategy.json"),
+            CRAWL_MODE=mode,
+        )
+        env.pop("RECORD_DIR", None)
+        if concurrency:
+            env["CRAWL_CONCURRENCY"] = str(concurrency)
+
+        res = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "_bench_child", stats_path],
+            cwd=work, env=env, stdout=subprocess.DEVNULL
+        )
+        if res.returncode != 0:
+            raise RuntimeError("El benchmark falló (ver stderr)")
+
+        with open(stats_path, "r", encoding="utf-8") as f:
+            stats = json.load(f)
+
+    server.shutdown()
+
+    # ru_maxrss: KB en Linux, bytes en macOS. `resource` solo existe en Unix:
+    # se importa aquí para que scrapper_final.py (que usa record_page) cargue en Windows
+    try:
+        import resource
+    except ImportError:
+        peak_mb = None
+    else:
+        peak = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+        peak_mb = round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+    matches = stats["matches"] or 1
+    report = {
+        "modo": mode,
+        "partidos": stats["matches"],
+        "segundos": round(stats["elapsed"], 3),
+        "partidos_por_segundo": round(stats["matches"] / stats["elapsed"], 3),
+        "peticiones": server.requests,
+        "peticiones_por_partido": round(server.requests / matches, 3),
+        "errores_inyectados": server.errors,
+        "no_encontradas": server.not_found,
+        "fallbacks_selenium": stats["selenium_fallbacks"],
+        "pico_rss_mb": peak_mb,
+    }
+    return report
+
+
+############################################################
+# CLI
+############################################################
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Grabación, replay y benchmark del scraper LiveFutbol")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    r = sub.add_parser("record", help="graba las páginas de una temporada")
+    r.add_argument("--dir", required=True)
+    r.add_argument("--season-url")
+
+    def server_args(p):
+        p.add_argument("--dir", required=True)
+        p.add_argument("--latency", type=float, default=0.0, help="segundos por respuesta")
+        p.add_argument("--jitter", type=float, default=0.0)
+        p.add_argument("--error-rate", type=float, default=0.0, help="fracción de respuestas con error")
+        p.add_argument("--error-code", type=int, default=503)
+        p.add_argument("--retry-after", type=int, default=1)
+
+    s = sub.add_parser("serve", help="sirve una grabación por HTTP")
+    server_args(s)
+    s.add_argument("--port", type=int, default=8765)
+
+    b = sub.add_parser("bench", help="ejecuta main() completo contra el replay")
+    server_args(b)
+    b.add_argument("--mode", choices=["serie", "async", "pipeline"], default="serie")
+    b.add_argument("--concurrency", type=int)
+    b.add_argument("--json", help="guardar el informe en este fichero")
+
+    c = sub.add_parser("_bench_child")
+    c.add_argument("stats_path")
+
+    args = ap.parse_args(argv)
+
+    if args.cmd == "_bench_child":
+        _bench_child(args.stats_path)
+        return
+
+    if args.cmd == "record":
+        record(args.dir, args.season_url)
+        return
+
+    opts = dict(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                error_code=args.error_code, retry_after=args.retry_after)
+
+    if args.cmd == "serve":
+        server, base = start_server(os.path.abspath(args.dir), port=args.port, **opts)
+        print(f"[replay] Sirviendo {len(server.index)} páginas en {base} (Ctrl+C para salir)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            server.shutdown()
+        return
+
+    report = bench(args.dir, mode=args.mode, concurrency=args.concurrency, **opts)
+    for k, v in report.items():
+        print(f"{k:>24}: {v}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+###############################################
+# RUTAS DE LOS DATASETS (LAYOUT PARTICIONADO)
+# Una sola API de rutas para scraper, convertidor e importador:
+#
+#   DATA_DIR/temporada=25-26/players_stats.csv          (dataset de temporada)
+#   DATA_DIR/temporada=25-26/jornada=7/dfequipos.csv    (dataset por jornada)
+#
+# Cada temporada tiene su directorio (CSV, checkpoint, staging), así
+# varias temporadas conviven y se pueden procesar a la vez.
+# Sin DATA_DIR todo sigue en el directorio actual, como antes.
+###############################################
+
+import os
+import re
+
+import pandas as pd
+
+from columnar import guardar_dataset, leer_dataset, ruta_dataset
+
+DATA_DIR = os.environ.get("DATA_DIR")
+TEMPORADA = os.environ.get("TEMPORADA")      # p.ej. 25-26; el scraper la saca de SEASON_URL
+
+SEASON_RE = re.compile(r"/(\d{4})-(\d{4})/")
+JORNADA_RE = re.compile(r"(\d+)")
+JORNADA_DIR_RE = re.compile(r"^jornada=(\d+)$")
+
+
+def temporada_de_url(season_url):
+    """.../2025-2026/all-matches/ -> '25-26' (mismo formato que automatizacióntemporada.py)."""
+    m = SEASON_RE.search(season_url or "")
+    return f"{m.group(1)[2:]}-{m.group(2)[2:]}" if m else "temporada"
+
+
+def numero_jornada(x):
+    """'7. Jornada' / 7 -> 7"""
+    if isinstance(x, str):
+        return int(JORNADA_RE.search(x).group(1))
+    return int(x)
+
+
+def dir_temporada(temporada=None, root=None):
+    root = DATA_DIR if root is None else root
+    if not root:
+        return "."
+    if not temporada:
+        raise ValueError("Con DATA_DIR hay que indicar la temporada (TEMPORADA o SEASON_URL)")
+    return os.path.join(root, f"temporada={temporada}")
+
+
+def ruta(fichero, temporada=None, root=None):
+    """
+    Ruta de un fichero de la temporada ('players_stats.csv',
+    'processed_matches.jsonl', 'staging.sqlite'...). Sin DATA_DIR, el propio nombre.
+    """
+    root = DATA_DIR if root is None else root
+    if not root:
+        return fichero
+    return os.path.join(dir_temporada(temporada, root), fichero)
+
+
+def ruta_jornada(fichero, jornada, temporada=None, root=None):
+    return os.path.join(dir_temporada(temporada, root), f"jornada={int(jornada)}", fichero)
+
+
+def _existe(path):
+    return os.path.exists(path) or os.path.exists(ruta_dataset(path))
+
+
+def _borrar(path):
+    for p in {path, ruta_dataset(path)}:
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def jornadas_de(fichero, temporada=None, root=None):
+    """Jornadas con partición del dataset `fichero`, ordenadas."""
+    base = dir_temporada(temporada, root)
+    if not os.path.isdir(base):
+        return []
+    out = []
+    for d in os.listdir(base):
+        m = JORNADA_DIR_RE.match(d)
+        if m and _existe(os.path.join(base, d, fichero)):
+            out.append(int(m.group(1)))
+    return sorted(out)
+
+
+def guardar(df, fichero, temporada=None, root=None, por_jornada=False):
+    """
+    Guarda un dataset en el formato de DATA_FORMAT. Con por_jornada (y DATA_DIR)
+    se escribe una partición jornada=N por jornada y se quitan las que sobran
+    (y el fichero de temporada con el mismo nombre, si lo hubiera).
+    """
+    root = DATA_DIR if root is None else root
+    if not (root and por_jornada):
+        path = ruta(fichero, temporada, root)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        guardar_dataset(df, path)
+        return
+
+    nums = df["jornada"].map(numero_jornada)
+    escritas = set()
+    for j, parte in df.groupby(nums, sort=True):
+        path = ruta_jornada(fichero, j, temporada, root)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        guardar_dataset(parte, path)
+        escritas.add(int(j))
+
+    for j in set(jornadas_de(fichero, temporada, root)) - escritas:
+        path = ruta_jornada(fichero, j, temporada, root)
+        _borrar(path)
+        if not os.listdir(os.path.dirname(path)):
+            os.rmdir(os.path.dirname(path))
+    _borrar(ruta(fichero, temporada, root))
+
+
+def leer(fichero, temporada=None, root=None, jornadas=None, **read_csv):
+    """
+    Lee un dataset de la temporada: el fichero de temporada si existe, si no
+    sus particiones por jornada (solo las de `jornadas` si se indican).
+    """
+    path = ruta(fichero, temporada, root)
+    if _existe(path) or not (DATA_DIR if root is None else root):
+        df = leer_dataset(path, **read_csv)
+        if jornadas is not None:
+            df = df[df["jornada"].map(numero_jornada).isin(set(jornadas))]
+        return df
+
+    sel = jornadas_de(fichero, temporada, root)
+    if jornadas is not None:
+        sel = [j for j in sel if j in set(jornadas)]
+    if not sel:
+        raise FileNotFoundError(f"No hay datos de {fichero} en {dir_temporada(temporada, root)}")
+    partes = [leer_dataset(ruta_jornada(fichero, j, temporada, root), **read_csv) for j in sel]
+    return pd.concat(partes, ignore_index=True)
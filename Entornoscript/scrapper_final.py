@@ -5,43 +5,176 @@
 ###############################################
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 import pandas as pd
 import time
 import os
+import shutil
 import sys
-import json
 import re
-from urllib.parse import urljoin
-
-# Selenium fallback
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
-
-BASE = "https://www.livefutbol.com"
+import asyncio
+import contextlib
+import collections
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+
+# Selenium fallback (pool de navegadores reutilizables)
+from chrome_pool import get_pool
+from parse_lxml import (
+    parse_tree, text_strip, classes_of, ClassRe, Field, Spec,
+    xp_class, xp_class_exact, xp_class_contains
+)
+from cache_html import get_cache, conditional_headers, CACHE_MODE, PENDING_MATCH_TTL
+from fetch_strategy import get_strategy
+from replay import record_page
+from page_archive import archive_page
+from checkpoint import CheckpointJournal, PROCESSED_JOURNAL, load_legacy
+from stream_csv import MatchOutput
+from staging import abrir_staging, tabla_de, CSV_EXPORT
+from columnar import DATA_FORMAT, write_parquet, ruta_dataset, nombre_dataset
+from rutas import TEMPORADA, temporada_de_url, ruta, dir_temporada
+from fetch_metrics import get_metrics
+from rate_limiter import get_limiter, parse_retry_after, backoff_delay, MAX_RETRIES
+from records import Match, PlayerAppearance, PlayerTotals, TeamStatRow, RecordTable
+from player_stats import totales_desde_log, PLAYERS_BASE_CSV
+
+BASE = os.environ.get("LIVEFUTBOL_BASE", "https://www.livefutbol.com")
 SEASON_URL = "https://www.livefutbol.com/competition/co97/espana-primera-division/se96657/2025-2026/all-matches/" 
+SEASON_URL = os.environ.get("SEASON_URL", SEASON_URL)
 #"https://www.livefutbol.com/competition/co97/espana-primera-division/se45808/2022-2023/all-matches/" 
 #"https://www.livefutbol.com/competition/co97/espana-primera-division/se52580/2023-2024/all-matches/"
 #"https://www.livefutbol.com/competition/co97/espana-primera-division/se74771/2024-2025/all-matches/"
 
-RESULTS_CSV = "resultados_partidos.csv"
-PLAYERS_CSV = "players_stats.csv"
-TEAM_STATS_CSV = "team_stats.csv"
-PROCESSED_JSON = "processed_matches.json"
+# Ficheros de la temporada: en el directorio actual o, con DATA_DIR,
+# en DATA_DIR/temporada=<t>/ (ver rutas.py)
+TEMPORADA = TEMPORADA or temporada_de_url(SEASON_URL)
+RESULTS_CSV = ruta("resultados_partidos.csv", TEMPORADA)
+PLAYERS_CSV = ruta("players_stats.csv", TEMPORADA)
+TEAM_STATS_CSV = ruta("team_stats.csv", TEMPORADA)
+PROCESSED_JSON = ruta("processed_matches.json", TEMPORADA)     # checkpoint antiguo, solo se lee para migrar
+APPEARANCES_CSV = ruta("apariciones.csv", TEMPORADA)
+PLAYERS_BASE_CSV = ruta(PLAYERS_BASE_CSV, TEMPORADA)
 
 HEADERS = {"User-Agent": "Mozilla/5.0"}
 
+# Si se define, cada página descargada se graba para el servidor de replay (replay.py)
+RECORD_DIR = os.environ.get("RECORD_DIR")
+
+# Archivo comprimido de páginas crudas por temporada (opcional, ver page_archive.py)
+PAGE_ARCHIVE_DIR = os.environ.get("PAGE_ARCHIVE_DIR")
+
+# Pool de conexiones HTTP (keep-alive)
+HTTP_POOL_HOSTS = 4        # hosts distintos que mantiene el pool
+HTTP_POOL_PER_HOST = 6     # conexiones abiertas como máximo por host
+
+# Modo de crawl: "serie" (un partido cada vez) o "async" (varios a la vez)
+CRAWL_MODE = os.environ.get("CRAWL_MODE", "serie")
+CRAWL_CONCURRENCY = int(os.environ.get("CRAWL_CONCURRENCY", "8"))   # partidos en vuelo
+HOST_MAX_CONCURRENT = int(os.environ.get("HOST_MAX_CONCURRENT", "4"))  # peticiones simultáneas por host
+# El ritmo lo marca el limitador adaptativo (rate_limiter.py); esto es solo un suelo extra
+HOST_MIN_INTERVAL = float(os.environ.get("HOST_MIN_INTERVAL", "0"))  # segundos entre peticiones al mismo host
+
+# Modo pipeline: descargas en hilos, parsing en procesos
+PARSE_WORKERS = int(os.environ.get("PARSE_WORKERS", str(os.cpu_count() or 2)))
+PIPELINE_WINDOW = int(os.environ.get("PIPELINE_WINDOW", "32"))   # partidos descargados sin registrar, como máximo
+
 ############################################################
 # NETWORK UTILITIES
 ############################################################
 
+_session = None
+
+
+def get_session():
+    """
+    Devuelve la sesión HTTP compartida por todo el script.
+    Reutiliza conexiones TCP+TLS (keep-alive) y limita las conexiones por host.
+    Solo anuncia las compresiones que urllib3 sabe descomprimir
+    (gzip/deflate, y br si está instalado brotli).
+    """
+    global _session
+    if _session is None:
+        s = requests.Session()
+        s.headers.update(HEADERS)
+        s.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        adapter = HTTPAdapter(
+            pool_connections=HTTP_POOL_HOSTS,
+            pool_maxsize=HTTP_POOL_PER_HOST,
+            pool_block=True
+        )
+        s.mount("https://", adapter)
+        s.mount("http://", adapter)
+        _session = s
+    return _session
+
+
+def close_session():
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
+
+
+def request_with_backoff(url, headers=None, retries=MAX_RETRIES, info=None):
+    """
+    GET con el limitador adaptativo del host.
+    - 429/503: respeta Retry-After (o backoff) y reintenta
+    - 5xx / error de red: backoff exponencial con jitter y reintenta
+    Devuelve la última respuesta obtenida o None si nunca hubo respuesta.
+    Si se pasa `info` (dict), anota 'retries' y 'status'.
+    """
+    limiter = get_limiter(url)
+    metrics = get_metrics()
+    info = info if info is not None else {}
+    r = None
+
+    for attempt in range(retries + 1):
+        info["retries"] = attempt
+        limiter.acquire()
+        t0 = time.monotonic()
+        try:
+            r = get_session().get(url, timeout=15, headers=headers)
+        except requests.RequestException as e:
+            print(f"[fetch] Error de red en {url} (intento {attempt + 1}): {e}")
+            metrics.record_http(url, "error", time.monotonic() - t0, 0)
+            info["status"] = "error"
+            limiter.on_error()
+            if attempt < retries:
+                time.sleep(backoff_delay(attempt))
+            continue
+
+        latency = time.monotonic() - t0
+        metrics.record_http(url, r.status_code, latency, len(r.content))
+        info["status"] = r.status_code
+
+        if r.status_code in (429, 503):
+            retry_after = parse_retry_after(r.headers.get("Retry-After"))
+            print(f"[fetch] {r.status_code} en {url}, Retry-After={retry_after} (intento {attempt + 1})")
+            limiter.on_throttle(retry_after)
+            if attempt < retries and not retry_after:
+                time.sleep(backoff_delay(attempt))
+            continue
+
+        if r.status_code >= 500:
+            print(f"[fetch] {r.status_code} en {url} (intento {attempt + 1})")
+            limiter.on_error()
+            if attempt < retries:
+                time.sleep(backoff_delay(attempt))
+            continue
+
+        limiter.on_success(latency)
+        return r
+
+    return r
 
 
 def fetch_with_requests(url):
     try:
-        r = requests.get(url, headers=HEADERS, timeout=15)
+        r = request_with_backoff(url)
+        if r is None:
+            return None
         r.raise_for_status()
         return r.text
     except Exception as e:
@@ -49,49 +182,117 @@ def fetch_with_requests(url):
         return None
 
 
-def fetch_with_selenium(url):
+def fetch_with_selenium(url, require=None):
+    """
+    Carga la URL en un Chrome headless del pool compartido.
+    Espera explícitamente a la clase `require` (p.ej. 'module-gameplan')
+    en lugar de dormir un tiempo fijo.
+    """
     print("[selenium] fallback in:", url)
-    opts = Options()
-    opts.add_argument("--headless=new")
-    opts.add_argument("--no-sandbox")
-    opts.add_argument("--disable-gpu")
-
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
-    driver.get(url)
-    time.sleep(3)
-    html = driver.page_source
-    driver.quit()
+    get_limiter(url).acquire()
+    t0 = time.monotonic()
+    html = get_pool().fetch(url, wait_class=require)
+    get_metrics().record_selenium(url, time.monotonic() - t0, bool(html))
+    return html
+
+
+def fetch_html(url, require=None, ttl=None):
+    info = {}
+    t0 = time.monotonic()
+    html = _fetch_html(url, require, ttl, info)
+    get_metrics().record_fetch(url, time.monotonic() - t0, html, info)
+    if RECORD_DIR and html:
+        record_page(RECORD_DIR, url, html)
+    if PAGE_ARCHIVE_DIR and html:
+        archive_page(PAGE_ARCHIVE_DIR, SEASON_URL, url, html)
     return html
 
 
-def fetch_html(url, require=None):
+def _fetch_html(url, require=None, ttl=None, info=None):
     """
     Descarga HTML con requests y, si falla o no contiene un fragmento requerido,
     hace fallback automático a Selenium.
+    Las peticiones pasan por el limitador adaptativo del host (rate_limiter.py),
+    que reintenta 429/5xx con backoff antes de recurrir a Selenium.
+    Antes consulta la caché en disco (cache_html.py): si la entrada sigue
+    fresca no se toca la red, y si caducó se revalida con ETag/Last-Modified.
+    Si el registro de estrategias (fetch_strategy.py) sabe que esa clase de
+    URL necesita JS, se salta el intento con requests.
+    `ttl` (segundos) sustituye al TTL por patrón de URL.
+    `info` (dict) recoge caché, backend, motivo de fallback y reintentos
+    para las métricas (fetch_metrics.py).
     """
-    try:
-        r = requests.get(url, headers=HEADERS, timeout=15)
+    info = info if info is not None else {}
+    cache = get_cache()
+    cached = cache.lookup(url, ttl) if cache else None
+    info["cache"] = "off" if cache is None else ("miss" if cached is None else "hit")
+
+    if CACHE_MODE == "offline":
+        if cached:
+            info["backend"] = "cache"
+            return cached["html"]
+        print(f"[fetch_html] Modo offline: {url} no está en caché")
+        return None
+
+    if cached and cached["fresh"]:
+        info["backend"] = "cache"
+        return cached["html"]
+    if cached:
+        info["cache"] = "stale"
+
+    # Clases de URL que siempre necesitan JS van directas a Selenium
+    strategy = get_strategy()
+    if strategy.choose(url) == "selenium":
+        info["fallback"] = "strategy"
+        return _selenium_y_cache(url, require, cache, strategy, info)
+
+    info["backend"] = "requests"
+    r = request_with_backoff(url, headers=conditional_headers(cached), info=info)
+    if r is not None:
+        if r.status_code == 304 and cached:
+            cache.touch(url)
+            info["cache"] = "revalidated"
+            strategy.record(url, "requests", True)
+            return cached["html"]
         if r.status_code == 200:
             html = r.text
             if require and require not in html:
+                strategy.record(url, "requests", False)
+                info["fallback"] = "marker_missing"
                 print("[fetch_html] Requiere JS o bloque específico, usando Selenium...")
-                return fetch_with_selenium(url)
+                return _selenium_y_cache(url, require, cache, strategy, info)
+            strategy.record(url, "requests", True)
+            if cache:
+                cache.store(url, html, r.headers.get("ETag"), r.headers.get("Last-Modified"))
             return html
-    except Exception as e:
-        print("[fetch_html] Requests error:", e)
 
+    info["fallback"] = f"http_{r.status_code}" if r is not None else "network_error"
     print("[fetch_html] Usando Selenium como fallback")
-    return fetch_with_selenium(url)
+    return _selenium_y_cache(url, require, cache, strategy, info)
+
+
+def _selenium_y_cache(url, require, cache, strategy, info):
+    info["backend"] = "selenium"
+    html = fetch_with_selenium(url, require)
+    ok = bool(html) and (not require or require in html)
+    strategy.record(url, "selenium", ok)
+    # Solo se cachean páginas completas (con el bloque requerido)
+    if cache and ok:
+        cache.store(url, html)
+    return html
 
 
 ############################################################
 # UTILITIES
 ############################################################
 
+MINUTO_RE = re.compile(r"(\d+)\.")
+
+
 def extraer_minuto(texto):
     if texto is None:
         return None
-    m = re.search(r"(\d+)\.", texto)
+    m = MINUTO_RE.search(texto)
     return int(m.group(1)) if m else None
 
 
@@ -109,120 +310,183 @@ def minutos_jugados(entrar, salir, es_suplente, length=90):
     return 0
 
 
+def to_number(s):
+    s = s.strip().replace(",", ".").replace("%", "")
+    if s == "":
+        return None
+    try:
+        if "." in s:
+            return float(s)
+        return int(s)
+    except:
+        return s
+
+
 ############################################################
 # PARSE MAIN PAGE: partidos + enlaces lineup
 ############################################################
 
+ROUND_HEAD_CLASSES = ["hs-head", "hs-head--round", "round-head"]
+DATE_HEAD_CLASSES = ["hs-head", "hs-head--date", "hs-head--date", "date-head"]
+
+def _lineup_href(href):
+    return urljoin(BASE, href) if "lineup" in href else None
+
+
+# Specs de extracción: selectores, regex y conversiones declarados una
+# vez por tipo de página y compilados al importar el módulo
+GAMEPLAN = Field(f"//div[{xp_class('module-gameplan')}]", get="node")
+ROUND_HEADS = Field(f".//div[{xp_class_exact(' '.join(ROUND_HEAD_CLASSES))}]", get="node", many=True)
+
+PARTIDO_SPEC = Spec(
+    local=Field(f".//div[{xp_class('team-name-home')}]"),
+    visitante=Field(f".//div[{xp_class('team-name-away')}]"),
+    resultado=Field(f".//div[{xp_class('match-result')}]", default=""),
+    lineup_url=Field(f"(.//div[{xp_class('match-more')}])[1]//a/@href", get="value", coerce=_lineup_href),
+)
+
+
 def parsear_partidos(html):
-    soup = BeautifulSoup(html, "html.parser")
-    modulo = soup.find("div", class_="module-gameplan")
-    if not modulo:
-        raise RuntimeError("No se encontró module-gameplan")
+    return list(iter_partidos(html))
 
-    datos = []
-    jornadas = modulo.find_all("div", class_="hs-head hs-head--round round-head")
 
-    for jornada_tag in jornadas:
-        jornada_texto = jornada_tag.get_text(strip=True)
-        cursor = jornada_tag.find_next_sibling()
+def iter_partidos(html):
+    """
+    Generador de partidos del module-gameplan en una sola pasada hacia delante:
+    la jornada y la fecha actuales se llevan como estado, así el coste es
+    lineal en el número de partidos y se puede empezar a consumir antes de
+    recorrer toda la página.
+    """
+    modulo = GAMEPLAN(parse_tree(html))
+    if modulo is None:
+        raise RuntimeError("No se encontró module-gameplan")
+    return _recorrer_gameplan(modulo)
 
-        while cursor and cursor.get("class") != ["hs-head", "hs-head--round", "round-head"]:
-            if "match" in (cursor.get("class") or []):
-                local_tag = cursor.find("div", class_="team-name-home")
-                visit_tag = cursor.find("div", class_="team-name-away")
-                result_tag = cursor.find("div", class_="match-result")
 
-                local = local_tag.get_text(strip=True)
-                visitante = visit_tag.get_text(strip=True)
-                resultado = result_tag.get_text(strip=True) if result_tag else ""
+def _recorrer_gameplan(modulo):
+    # Contenedores de las cabeceras de jornada (normalmente solo el propio módulo)
+    padres = []
+    for ronda in ROUND_HEADS(modulo):
+        padre = ronda.getparent()
+        if not any(padre is p for p in padres):
+            padres.append(padre)
 
-                mm = cursor.find("div", class_="match-more")
-                lineup_href = None
-                if mm:
-                    a = mm.find("a", href=True)
-                    if a and "lineup" in a["href"]:
-                        lineup_href = urljoin(BASE, a["href"])
+    for padre in padres:
+        jornada = None
+        fecha = ""
+        for el in padre.iterchildren():
+            if not isinstance(el.tag, str):
+                continue
+            cls = classes_of(el)
 
-                fecha_tag = cursor.find_previous_sibling(
-                    "div", class_="hs-head hs-head--date hs-head--date date-head"
-                )
-                fecha = fecha_tag.get_text(strip=True) if fecha_tag else ""
+            if cls == ROUND_HEAD_CLASSES:
+                jornada = text_strip(el) if el.tag == "div" else None
+                continue
+            if cls == DATE_HEAD_CLASSES and el.tag == "div":
+                fecha = text_strip(el)
+                continue
+            if jornada is None or "match" not in cls:
+                continue
 
-                datos.append({
-                    "jornada": jornada_texto,
-                    "fecha": fecha,
-                    "local": local,
-                    "visitante": visitante,
-                    "resultado": resultado,
-                    "lineup_url": lineup_href
-                })
+            yield _leer_partido(el, jornada, fecha)
 
-            cursor = cursor.find_next_sibling()
 
-    return datos
+def _leer_partido(el, jornada, fecha):
+    return {"jornada": jornada, "fecha": fecha, **PARTIDO_SPEC.record(el)}
 
 
 ############################################################
 # PARSE LINEUP PAGE (jugadores)
 ############################################################
 
-def procesar_lineup_html(html):
-    soup = BeautifulSoup(html, "html.parser")
-    players = {}
+LINEUP_SIDES = ("home", "away")
+LINEUP_BLOCK_CLASSES = [
+    cls
+    for side in LINEUP_SIDES
+    for cls in (f"team-image team-image-{side} team-autoimage",
+                f"hs-lineup--starter {side}",
+                f"hs-lineup--bench {side}")
+]
+
+# Un único recorrido localiza los seis bloques (escudo, titulares, suplentes)
+LINEUP_BLOCKS = Field(
+    "//div[" + " or ".join(xp_class_exact(c) for c in LINEUP_BLOCK_CLASSES) + "]",
+    get="node", many=True
+)
+TEAM_IMG_ALT = Field(".//img", get="@alt")
+
+_EVENT = f".//div[{xp_class('event')}]"
+_PERSON = Field(f".//div[{xp_class('person-name')}]")
+_GOALS = Field(f"count(.//div[{xp_class_contains('goal')}])", get="count")
+
+STARTER_SPEC = Spec(
+    _EVENT,
+    nombre=_PERSON,
+    salida=Field(f".//div[{xp_class_exact('playing substitute-out')}]", get="raw", coerce=extraer_minuto),
+    goles=_GOALS,
+)
+BENCH_SPEC = Spec(
+    _EVENT,
+    nombre=_PERSON,
+    entrada=Field(f".//div[{xp_class_exact('playing substitute-in')}]", get="raw", coerce=extraer_minuto),
+    goles=_GOALS,
+)
+
+
+def apariciones_lineup_html(html):
+    """
+    Una fila por jugador convocado en la página lineup (HTML o árbol):
+    (nombre, equipo, titular, minuto_entrada, minuto_salida, minutos, goles).
+    """
+    tree = parse_tree(html)
+    filas = []
 
-    def procesar(side):
-        team_div = soup.find("div", class_=f"team-image team-image-{side} team-autoimage")
-        img = team_div.find("img") if team_div else None
-        team_name = img["alt"] if img and "alt" in img.attrs else side
+    bloques = {}
+    for div in LINEUP_BLOCKS(tree):
+        bloques.setdefault(" ".join(classes_of(div)), div)
+
+    for side in LINEUP_SIDES:
+        team_div = bloques.get(f"team-image team-image-{side} team-autoimage")
+        alt = TEAM_IMG_ALT(team_div) if team_div is not None else None
+        team_name = alt if alt is not None else side
 
         # titulares
-        titulares = soup.find("div", class_=f"hs-lineup--starter {side}")
-        if titulares:
-            for ev in titulares.find_all("div", class_="event"):
-                ntag = ev.find("div", class_="person-name")
-                if not ntag:
+        titulares = bloques.get(f"hs-lineup--starter {side}")
+        if titulares is not None:
+            for _, ev in STARTER_SPEC.extract(titulares):
+                if ev["nombre"] is None:
                     continue
-                nombre = ntag.get_text(strip=True)
-                out_tag = ev.find("div", class_="playing substitute-out")
-                salida = extraer_minuto(out_tag.text) if out_tag else None
-                goles = len(ev.find_all("div", class_=re.compile("goal")))
-
-                key = (nombre, team_name)
-                mins = minutos_jugados(0, salida, False)
-
-                if key not in players:
-                    players[key] = {"equipo": team_name, "minutos": 0, "goles": 0, "partidos": 0}
-
-                players[key]["minutos"] += mins
-                players[key]["goles"] += goles
-                if mins > 0:
-                    players[key]["partidos"] += 1
+                mins = minutos_jugados(0, ev["salida"], False)
+                filas.append((ev["nombre"], team_name, 1, 0, ev["salida"], mins, ev["goles"]))
 
         # suplentes
-        bench = soup.find("div", class_=f"hs-lineup--bench {side}")
-        if bench:
-            for ev in bench.find_all("div", class_="event"):
-                ntag = ev.find("div", class_="person-name")
-                if not ntag:
+        bench = bloques.get(f"hs-lineup--bench {side}")
+        if bench is not None:
+            for _, ev in BENCH_SPEC.extract(bench):
+                if ev["nombre"] is None:
                     continue
-                nombre = ntag.get_text(strip=True)
-                in_tag = ev.find("div", class_="playing substitute-in")
-                entrada = extraer_minuto(in_tag.text) if in_tag else None
-                goles = len(ev.find_all("div", class_=re.compile("goal")))
+                mins = minutos_jugados(ev["entrada"], None, True)
+                filas.append((ev["nombre"], team_name, 0, ev["entrada"], None, mins, ev["goles"]))
 
-                key = (nombre, team_name)
-                mins = minutos_jugados(entrada, None, True)
+    return filas
 
-                if key not in players:
-                    players[key] = {"equipo": team_name, "minutos": 0, "goles": 0, "partidos": 0}
 
-                players[key]["minutos"] += mins
-                players[key]["goles"] += goles
-                if mins > 0:
-                    players[key]["partidos"] += 1
+def procesar_lineup_html(html):
+    """
+    Totales por jugador de una página lineup (HTML o árbol ya parseado):
+    {(nombre, equipo): {'equipo', 'minutos', 'goles', 'partidos'}}
+    """
+    players = {}
+    for nombre, team_name, _, _, _, mins, goles in apariciones_lineup_html(html):
+        key = (nombre, team_name)
+        if key not in players:
+            players[key] = {"equipo": team_name, "minutos": 0, "goles": 0, "partidos": 0}
+
+        players[key]["minutos"] += mins
+        players[key]["goles"] += goles
+        if mins > 0:
+            players[key]["partidos"] += 1
 
-    procesar("home")
-    procesar("away")
     return players
 
 
@@ -230,7 +494,7 @@ def procesar_lineup_html(html):
 # PARSE TEAM-STATISTICS PAGE
 ############################################################
 
-def parse_team_statistics_page(url):
+def parse_team_statistics_page(url, ttl=None):
     """
     Descarga y parsea la página de 'team-statistics'.
     Devuelve una lista de filas:
@@ -242,50 +506,69 @@ def parse_team_statistics_page(url):
         return []
 
     print(f"  [team_stats] Descargando {url} ...")
-    html = fetch_html(url, require="hs-comparison")
+    html = fetch_html(url, require="hs-comparison", ttl=ttl)
     if not html:
         print(f"  [team_stats] No se pudo descargar HTML para {url}.")
         return []
 
-    soup = BeautifulSoup(html, "html.parser")
+    return parsear_team_statistics_html(html, url)
+
+
+# Bloque de comparación: varias heurísticas en orden
+STATS_BLOCK = Field(
+    f"//ul[{xp_class('hs-comparison')}]",
+    f"//ul[{xp_class_contains('hs-comparison')}]",
+    f"//div[{xp_class_contains('hs-comparison')}]",
+    get="node"
+)
+
+
+def _side_div(side):
+    return f"((.//li[{xp_class_contains('hs-head')}])[1]//div[{xp_class_contains(f'hs-{side}')}])[1]"
+
 
-    # Buscar el bloque de comparación con varias heurísticas
-    header = soup.find("ul", class_="hs-comparison")
-    if not header:
-        header = soup.find("ul", class_=re.compile(r"hs-comparison"))
-    if not header:
-        header = soup.find("div", class_=re.compile(r"hs-comparison"))
+def _strip(s):
+    return s.strip()
 
-    if not header:
+
+STATS_SHORTNAME = {
+    side: Field(f"{_side_div(side)}//div[{xp_class_contains('team-shortname')}]")
+    for side in ("home", "away")
+}
+STATS_IMG_ALT = {
+    side: Field(f"({_side_div(side)}//img)[1]", get="@alt", coerce=_strip)
+    for side in ("home", "away")
+}
+STATS_IMGS_ALT = Field(".//img", get="node", many=True)
+
+STATS_ROW_SPEC = Spec(
+    f".//li[not({xp_class_contains('hs-head')})]",
+    stat=Field(f".//div[{xp_class('hs-name')}]"),
+    home=Field(f".//div[{xp_class_exact('hs-value hs-value-home')}]", ClassRe("div", r"hs-value.*home"), get="node"),
+    away=Field(f".//div[{xp_class_exact('hs-value hs-value-away')}]", ClassRe("div", r"hs-value.*away"), get="node"),
+)
+
+
+def parsear_team_statistics_html(html, url=""):
+    """
+    Parsea el HTML ya descargado de una página 'team-statistics'.
+    Misma salida que parse_team_statistics_page.
+    """
+    header = STATS_BLOCK(parse_tree(html))
+
+    if header is None:
         print(f"  [team_stats] No se encontró el bloque hs-comparison en {url}. Saltando estadísticas.")
         return []
 
-    # Nombres de equipos
-    home_name = None
-    away_name = None
-    head_li = header.find("li", class_=re.compile(r"hs-head"))
-    if head_li:
-        home_div = head_li.find("div", class_=re.compile(r"hs-home"))
-        away_div = head_li.find("div", class_=re.compile(r"hs-away"))
-        if home_div:
-            sn = home_div.find("div", class_=re.compile(r"team-shortname"))
-            if sn:
-                home_name = sn.get_text(strip=True)
-            else:
-                img = home_div.find("img")
-                if img and img.get("alt"):
-                    home_name = img.get("alt").strip()
-        if away_div:
-            sn = away_div.find("div", class_=re.compile(r"team-shortname"))
-            if sn:
-                away_name = sn.get_text(strip=True)
-            else:
-                img = away_div.find("img")
-                if img and img.get("alt"):
-                    away_name = img.get("alt").strip()
+    # Nombres de equipos: shortname, si no el alt del escudo
+    names = {}
+    for side in ("home", "away"):
+        name = STATS_SHORTNAME[side](header)
+        names[side] = name if name is not None else STATS_IMG_ALT[side](header)
+    home_name, away_name = names["home"], names["away"]
 
     if not home_name or not away_name:
-        imgs = header.find_all("img")
+        imgs = STATS_IMGS_ALT(header)
         if imgs and len(imgs) >= 2:
             if not home_name and imgs[0].get("alt"):
                 home_name = imgs[0].get("alt").strip()
@@ -299,45 +582,19 @@ def parse_team_statistics_page(url):
 
     rows = []
 
-    for li in header.find_all("li"):
-        classes = li.get("class") or []
-        if any(re.search(r"hs-head", c) for c in classes):
-            continue
-
-        name_tag = li.find("div", class_="hs-name")
-        if not name_tag:
+    for _, r in STATS_ROW_SPEC.extract(header):
+        if r["stat"] is None:
             continue
-        stat = name_tag.get_text(strip=True)
-
-        hv = li.find("div", class_="hs-value hs-value-home")
-        av = li.find("div", class_="hs-value hs-value-away")
-        if not hv:
-            hv = li.find("div", class_=re.compile(r"hs-value.*home"))
-        if not av:
-            av = li.find("div", class_=re.compile(r"hs-value.*away"))
+        stat = r["stat"]
 
-        if not (hv and av):
+        if r["home"] is None or r["away"] is None:
             print(f"  [team_stats] Stat '{stat}' sin valores home/away claros, se omite.")
             continue
 
-        def to_number(s):
-            s = s.strip().replace(",", ".").replace("%", "")
-            if s == "":
-                return None
-            try:
-                if "." in s:
-                    return float(s)
-                return int(s)
-            except:
-                return s
-
-        home_val = to_number(hv.get_text(strip=True))
-        away_val = to_number(av.get_text(strip=True))
-
         rows.append({
             "stat": stat,
-            "home": home_val,
-            "away": away_val,
+            "home": to_number(text_strip(r["home"])),
+            "away": to_number(text_strip(r["away"])),
             "home_team": home_name,
             "away_team": away_name
         })
@@ -352,7 +609,7 @@ def parse_team_statistics_page(url):
 # NUEVA FUNCIÓN: obtener SIEMPRE el enlace correcto team-statistics
 ############################################################
 
-def get_correct_team_stats_link_from_lineup(lineup_url):
+def get_correct_team_stats_link_from_lineup(lineup_url, ttl=None):
     """
     Obtiene SIEMPRE el enlace correcto:
     /match-report/.../team-statistics/
@@ -362,35 +619,48 @@ def get_correct_team_stats_link_from_lineup(lineup_url):
         print("[team_stats_link] lineup_url vacío")
         return None
 
-    html = fetch_html(lineup_url, require=None)
+    html = fetch_html(lineup_url, require=None, ttl=ttl)
     if not html:
         print(f"[team_stats_link] No se pudo descargar lineup {lineup_url}")
         return None
 
-    soup = BeautifulSoup(html, "html.parser")
+    return extraer_team_stats_link(html)
+
+
+STATS_ARTICLE = Field("//article[@id='hs-content']", get="node")
+MATCH_NAV = Field(
+    f".//nav[{xp_class('hs-menu-level-sub')}]",
+    f".//nav[{xp_class('hs-menu-level-match')}]",
+    get="node"
+)
+MENU_LIST = Field(f".//ul[{xp_class('hs-menu--list')}]", get="node")
+MENU_HREFS = Field(".//a/@href", get="value", coerce=_strip, many=True)
 
+
+def extraer_team_stats_link(html):
+    """
+    Busca el enlace team-statistics en el HTML (o árbol ya parseado)
+    de una página lineup.
+    """
     # Buscar SOLO dentro de <article id="hs-content">
-    article = soup.find("article", id="hs-content")
-    if not article:
+    article = STATS_ARTICLE(parse_tree(html))
+    if article is None:
         print("[team_stats_link] No se encontró <article id='hs-content'> (posible JS no cargado)")
         return None
 
     # Buscar SOLO el menú de nivel de partido
-    nav = article.find("nav", class_="hs-menu-level-sub")
-    if not nav:
-        nav = article.find("nav", class_="hs-menu-level-match")
-    if not nav:
+    nav = MATCH_NAV(article)
+    if nav is None:
         print("[team_stats_link] No se encontró nav.hs-menu-level-sub ni hs-menu-level-match")
         return None
 
-    ul = nav.find("ul", class_="hs-menu--list")
-    if not ul:
+    ul = MENU_LIST(nav)
+    if ul is None:
         print("[team_stats_link] No se encontró ul.hs-menu--list dentro del nav")
         return None
 
     # Buscar el enlace correcto (solo match-report, NO competition)
-    for a in ul.find_all("a", href=True):
-        href = a["href"].strip()
+    for href in MENU_HREFS(ul):
         if "/match-report/" in href and "team-statistics" in href:
             full = urljoin(BASE, href)
             print("[team_stats_link] Enlace correcto encontrado:", full)
@@ -404,19 +674,28 @@ def get_correct_team_stats_link_from_lineup(lineup_url):
 # CSV DATA MANAGEMENT
 ############################################################
 
-def load_players():
-    if not os.path.exists(PLAYERS_CSV):
-        return {}
-    df = pd.read_csv(PLAYERS_CSV)
+def load_players(store=None):
+    """
+    Totales de temporada desde el log de apariciones (+ base antigua).
+    Un players_stats.csv de antes del log se convierte en la base la
+    primera vez, para no perder lo ya acumulado. Sin CSV (CSV_EXPORT=0)
+    el log es la tabla apariciones del staging.
+    """
+    if (os.path.exists(PLAYERS_CSV) and not os.path.exists(APPEARANCES_CSV)
+            and not os.path.exists(PLAYERS_BASE_CSV)):
+        shutil.copyfile(PLAYERS_CSV, PLAYERS_BASE_CSV)
+
+    apariciones = None
+    if store is not None and not CSV_EXPORT:
+        apariciones = store.read_frame(tabla_de(APPEARANCES_CSV))
+    df = totales_desde_log(APPEARANCES_CSV, PLAYERS_BASE_CSV, apariciones)
     base = {}
-    for _, r in df.iterrows():
-        key = (r["nombre"], r["equipo"])
-        base[key] = {
-            "equipo": r["equipo"],
-            "minutos": int(r["minutos_totales"]),
-            "goles": int(r["goles_totales"]),
-            "partidos": int(r["partidos_jugados"])
-        }
+    for rec in map(PlayerTotals._make, zip(
+            df["nombre"], df["equipo"],
+            df["minutos_totales"].astype(int).tolist(),
+            df["goles_totales"].astype(int).tolist(),
+            df["partidos_jugados"].astype(int).tolist())):
+        base[(rec.nombre, rec.equipo)] = rec
     return base
 
 
@@ -432,25 +711,28 @@ def load_players():
  #       })
  #   pd.DataFrame(rows).to_csv(PLAYERS_CSV, index=False)
 
-def save_players(players, retries=10, delay=1):
+PLAYERS_CSV_COLUMNS = {
+    "minutos": "minutos_totales",
+    "goles": "goles_totales",
+    "partidos": "partidos_jugados"
+}
+
+
+def save_players(players, retries=10, delay=1, store=None):
     """
     Guarda players_stats.csv de forma extremadamente robusta.
     - Usa archivo temporal
     - Reintenta automáticamente si Windows bloquea el archivo
     - No pierde datos en ningún escenario
+    Con staging, la tabla players_stats se reescribe también (o solo ella si CSV_EXPORT=0).
     """
 
-    rows = []
-    for (nombre, equipo), v in players.items():
-        rows.append({
-            "nombre": nombre,
-            "equipo": equipo,
-            "minutos_totales": v["minutos"],
-            "goles_totales": v["goles"],
-            "partidos_jugados": v["partidos"]
-        })
+    df = RecordTable(PlayerTotals, players.values()).to_frame().rename(columns=PLAYERS_CSV_COLUMNS)
 
-    df = pd.DataFrame(rows)
+    if store is not None:
+        store.write_frame(tabla_de(PLAYERS_CSV), df)
+        if not CSV_EXPORT:
+            return
 
     tmp_file = PLAYERS_CSV + ".tmp"
 
@@ -474,18 +756,420 @@ def save_players(players, retries=10, delay=1):
     print("[save_players] ERROR FATAL: No se pudo guardar players_stats.csv después de varios intentos.")
 
 
+def abrir_salida(committed=None, store=None, done=()):
+    """
+    CSV de salida en streaming (una escritura por partido). `committed`: offsets
+    del checkpoint; lo escrito después del último partido confirmado se recorta.
+    Con `store` cada partido se escribe también en el staging SQLite (y se
+    descartan sus filas de partidos que no están en `done`).
+    """
+    return MatchOutput({
+        "resultados": (RESULTS_CSV, Match),
+        "team_stats": (TEAM_STATS_CSV, TeamStatRow),
+        "apariciones": (APPEARANCES_CSV, PlayerAppearance),
+    }, committed, store=store, done=done, csv=store is None or CSV_EXPORT)
+
+
 def safe_to_csv(df, filename, retries=10, delay=0.5):
+    """Con DATA_FORMAT=parquet escribe <nombre>.parquet con el esquema del dataset."""
     tmp = filename + ".tmp"
     for i in range(retries):
         try:
-            df.to_csv(tmp, index=False)
-            os.replace(tmp, filename)
+            if DATA_FORMAT == "parquet":
+                write_parquet(df, ruta_dataset(filename), nombre_dataset(filename))
+            else:
+                df.to_csv(tmp, index=False)
+                os.replace(tmp, filename)
             return
         except PermissionError:
             time.sleep(delay)
     raise RuntimeError(f"No se pudo escribir {filename}")
 
 
+def exportar_columnar(store=None):
+    """
+    DATA_FORMAT=parquet: al cerrar, los datasets de la temporada (CSV en
+    streaming o tablas del staging) se exportan a Parquet.
+    """
+    for path in (RESULTS_CSV, TEAM_STATS_CSV, APPEARANCES_CSV, PLAYERS_CSV):
+        df = store.read_frame(tabla_de(path)) if store is not None else pd.read_csv(path)
+        safe_to_csv(df, path)
+
+
+############################################################
+# MATCH PAGE: lineup descargado y parseado una sola vez
+############################################################
+
+LINEUP_URL_RE = re.compile(r"^(.*/match-report/.+/ma\d+/[^/]+/)lineup/?$")
+MATCH_ID_RE = re.compile(r"/(ma\d+)/")
+
+
+def match_id(lineup_url):
+    """Id estable del partido en livefutbol (ma<id>) o None."""
+    m = MATCH_ID_RE.search(lineup_url or "")
+    return m.group(1) if m else None
+
+
+def derive_team_stats_url(lineup_url):
+    """
+    .../match-report/co97/primera-division/ma10299623/athletic-club_getafe-cf/lineup/
+    -> .../match-report/co97/primera-division/ma10299623/athletic-club_getafe-cf/team-statistics/
+    Devuelve None si la URL no tiene la forma esperada.
+    """
+    m = LINEUP_URL_RE.match(lineup_url or "")
+    return m.group(1) + "team-statistics/" if m else None
+
+
+class MatchPage:
+    """
+    Página lineup de un partido. Se descarga y se parsea una vez y el mismo
+    árbol sirve al extractor de jugadores y al buscador del enlace de estadísticas.
+    """
+
+    def __init__(self, lineup_url, html):
+        self.lineup_url = lineup_url
+        self.html = html
+        self.tree = parse_tree(html) if html else None
+
+    @classmethod
+    def fetch(cls, lineup_url, ttl=None):
+        return cls(lineup_url, fetch_html(lineup_url, ttl=ttl))
+
+    def players(self):
+        if self.tree is None:
+            print(f"[match_page] No se pudo descargar lineup {self.lineup_url}")
+            return []
+        return apariciones_lineup_html(self.tree)
+
+    def team_stats_url(self):
+        """URL derivada del id ma<id>; si no se puede, el enlace del menú del partido."""
+        url = derive_team_stats_url(self.lineup_url)
+        if url:
+            return url
+        return self.team_stats_link()
+
+    def team_stats_link(self):
+        if self.tree is None:
+            return None
+        return extraer_team_stats_link(self.tree)
+
+
+############################################################
+# PROCESADO DE UN PARTIDO
+############################################################
+
+def match_key(p):
+    """
+    Clave del checkpoint: el id ma<id> de livefutbol (único entre temporadas).
+    Sin enlace lineup: jornada|local|visitante (único dentro de la temporada).
+    """
+    return match_id(p["lineup_url"]) or f"{p['jornada']}|{p['local']}|{p['visitante']}"
+
+
+def legacy_match_key(p):
+    # Clave de processed_matches.json (fecha suele venir vacía: choca entre ida y vuelta)
+    return f"{p['fecha']}|{p['local']}|{p['visitante']}"
+
+
+def partido_terminado(p):
+    return bool(re.match(r"^\s*\d+\s*:\s*\d+\s*$", p["resultado"] or ""))
+
+
+def ttl_partido(p):
+    """
+    Las páginas de partidos terminados no caducan nunca en caché (regla por
+    defecto de /match-report/); las de partidos pendientes, en poco tiempo.
+    """
+    return None if partido_terminado(p) else PENDING_MATCH_TTL
+
+
+def base_info_partido(p):
+    return Match(p["jornada"], p["fecha"], p["local"], p["visitante"], p["resultado"], p["lineup_url"])
+
+
+def filas_team_stats(p, stats):
+    return [
+        TeamStatRow(p["jornada"], p["fecha"], p["local"], p["visitante"],
+                    row["stat"], row["home"], row["away"])
+        for row in stats
+    ]
+
+
+def apariciones_partido(p, filas):
+    """Filas de apariciones_lineup_html -> PlayerAppearance con id y jornada del partido."""
+    mid = match_id(p["lineup_url"])
+    return [PlayerAppearance(mid, p["jornada"], *f) for f in filas]
+
+
+def procesar_partido(p):
+    """
+    Descarga y parsea lineup + estadísticas de un partido.
+    No toca el estado global: devuelve un dict con
+    {'partido', 'info': Match, 'players': [PlayerAppearance],
+     'team_stats': [TeamStatRow]} para registrar_partido.
+    """
+    lineup_players = []
+    team_stats = []
+
+    if p["lineup_url"]:
+        ttl = ttl_partido(p)
+        page = MatchPage.fetch(p["lineup_url"], ttl=ttl)
+        lineup_players = apariciones_partido(p, page.players())
+
+        stat_link = page.team_stats_url()
+        if stat_link:
+            stats = parse_team_statistics_page(stat_link, ttl=ttl)
+            if not stats:
+                # La URL derivada no funcionó: probar con el enlace del menú
+                nav_link = page.team_stats_link()
+                if nav_link and nav_link != stat_link:
+                    stats = parse_team_statistics_page(nav_link, ttl=ttl)
+            team_stats = filas_team_stats(p, stats)
+
+    return {
+        "partido": p,
+        "info": base_info_partido(p),
+        "players": lineup_players,
+        "team_stats": team_stats
+    }
+
+
+def registrar_partido(res, players_master, salida, processed):
+    """
+    Fusiona el resultado de procesar_partido en el estado de la temporada,
+    lo escribe en los CSV de salida y confirma el partido en el diario de
+    checkpoint (`processed`) junto con los offsets de esos CSV.
+    """
+    for ap in res["players"]:
+        key = (ap.nombre, ap.equipo)
+        tot = PlayerTotals.de_aparicion(ap)
+        prev = players_master.get(key)
+        players_master[key] = tot if prev is None else prev.sumar(tot)
+
+    # ========================
+    # Guardados seguros (mínimos): resultados, team stats y apariciones se
+    # añaden por partido; players_stats.csv se compacta al final
+    # ========================
+    key = match_key(res["partido"])
+    offsets = salida.write_match({
+        "resultados": [res["info"]],
+        "team_stats": res["team_stats"],
+        "apariciones": res["players"],
+    }, key)
+
+    processed.commit(key, offsets=offsets)
+
+
+############################################################
+# CRAWL CONCURRENTE (asyncio)
+############################################################
+
+class HostPoliteness:
+    """
+    Presupuesto de cortesía por host: como máximo `max_concurrent`
+    peticiones a la vez y `min_interval` segundos entre inicios de petición.
+    """
+
+    def __init__(self, max_concurrent=HOST_MAX_CONCURRENT, min_interval=HOST_MIN_INTERVAL):
+        self.max_concurrent = max_concurrent
+        self.min_interval = min_interval
+        self._sems = {}
+        self._next_slot = {}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, url):
+        host = urlparse(url).netloc
+        sem = self._sems.setdefault(host, asyncio.Semaphore(self.max_concurrent))
+        async with sem:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = start + self.min_interval
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+async def fetch_html_async(url, politeness, require=None, ttl=None):
+    async with politeness.slot(url):
+        return await asyncio.to_thread(fetch_html, url, require, ttl)
+
+
+async def fetch_team_stats_async(url, politeness, ttl=None):
+    html = await fetch_html_async(url, politeness, require="hs-comparison", ttl=ttl)
+    if not html:
+        return []
+    return parsear_team_statistics_html(html, url)
+
+
+async def procesar_partido_async(p, politeness):
+    """
+    Versión asyncio de procesar_partido: cada descarga pasa por el
+    presupuesto de cortesía del host y se ejecuta en un hilo.
+    """
+    lineup_players = []
+    team_stats = []
+
+    if p["lineup_url"]:
+        ttl = ttl_partido(p)
+        html = await fetch_html_async(p["lineup_url"], politeness, ttl=ttl)
+        page = MatchPage(p["lineup_url"], html)
+        lineup_players = apariciones_partido(p, page.players())
+
+        stat_link = page.team_stats_url()
+        stats = []
+        if stat_link:
+            stats = await fetch_team_stats_async(stat_link, politeness, ttl)
+            nav_link = page.team_stats_link() if not stats else None
+            if nav_link and nav_link != stat_link:
+                stats = await fetch_team_stats_async(nav_link, politeness, ttl)
+        team_stats = filas_team_stats(p, stats)
+
+    return {
+        "partido": p,
+        "info": base_info_partido(p),
+        "players": lineup_players,
+        "team_stats": team_stats
+    }
+
+
+async def crawl_async(pendientes, registrar, concurrency=CRAWL_CONCURRENCY, politeness=None,
+                      window=PIPELINE_WINDOW):
+    """
+    Procesa `pendientes` (iterable de (i, partido); p.ej. el generador que
+    aún está parseando la temporada) con hasta `concurrency` partidos en
+    vuelo. Se leen según avanza el crawl: como mucho `window` tareas creadas
+    sin registrar. Los resultados se registran en el orden original de la
+    temporada, así la salida es determinista.
+    """
+    politeness = politeness or HostPoliteness()
+    sem = asyncio.Semaphore(concurrency)
+    window = max(window, concurrency)
+    en_vuelo = collections.deque()
+
+    async def worker(p):
+        async with sem:
+            return await procesar_partido_async(p, politeness)
+
+    async def registrar_primero():
+        i, p, task = en_vuelo.popleft()
+        try:
+            res = await task
+        except Exception as e:
+            print(f"[crawl_async] Error en {p['local']} vs {p['visitante']}: {e}")
+            return
+        registrar(i, res)
+
+    for i, p in pendientes:
+        en_vuelo.append((i, p, asyncio.create_task(worker(p))))
+        if len(en_vuelo) >= window:
+            await registrar_primero()
+        else:
+            # La tarea arranca su descarga antes de parsear el siguiente partido
+            await asyncio.sleep(0)
+
+    while en_vuelo:
+        await registrar_primero()
+
+
+############################################################
+# PIPELINE: DESCARGA (hilos) -> PARSING (procesos)
+############################################################
+
+def parsear_paginas_partido(lineup_url, lineup_html, stats_url, stats_html):
+    """
+    Trabajo de un proceso parser: recibe el HTML crudo de un partido y
+    devuelve solo los datos extraídos (sin HTML ni árbol).
+    nav_link solo se busca si las estadísticas de la URL derivada fallan.
+    """
+    players = []
+    nav_link = None
+    tree = parse_tree(lineup_html) if lineup_html else None
+    if tree is not None:
+        players = apariciones_lineup_html(tree)
+
+    stats = parsear_team_statistics_html(stats_html, stats_url) if stats_html else []
+    if not stats and tree is not None:
+        nav_link = extraer_team_stats_link(tree)
+
+    return {"players": players, "stats": stats, "nav_link": nav_link}
+
+
+def parsear_stats_job(html, url):
+    return parsear_team_statistics_html(html, url) if html else []
+
+
+def descargar_partido(p, parse_pool):
+    """
+    Hilo descargador: baja lineup + team-statistics (URL derivada del id, no
+    hace falta parsear la lineup para conocerla) y encola el HTML en el pool
+    de parsers. Devuelve el futuro del parseo.
+    """
+    ttl = ttl_partido(p)
+    lineup_html = fetch_html(p["lineup_url"], ttl=ttl)
+    stats_url = derive_team_stats_url(p["lineup_url"])
+    stats_html = fetch_html(stats_url, require="hs-comparison", ttl=ttl) if stats_url else None
+    return parse_pool.submit(parsear_paginas_partido, p["lineup_url"], lineup_html, stats_url, stats_html)
+
+
+def _mp_context():
+    # Los descargadores son hilos: nada de fork con hilos vivos
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def crawl_pipeline(pendientes, registrar, downloaders=CRAWL_CONCURRENCY,
+                   workers=PARSE_WORKERS, window=PIPELINE_WINDOW):
+    """
+    Descargas y parsing desacoplados: `downloaders` hilos descargan el HTML
+    y un ProcessPoolExecutor de `workers` procesos lo parsea en paralelo.
+    Como mucho `window` partidos están descargados o en cola sin registrar
+    (contrapresión: la memoria no crece con la temporada). Los resultados
+    se registran en el orden original de la temporada.
+    """
+    window = max(1, window)
+    pendientes = iter(pendientes)
+    en_vuelo = collections.deque()
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_mp_context()) as parse_pool, \
+            ThreadPoolExecutor(max_workers=downloaders) as download_pool:
+
+        def encolar():
+            for i, p in pendientes:
+                if not p["lineup_url"]:
+                    en_vuelo.append((i, p, None))
+                else:
+                    en_vuelo.append((i, p, download_pool.submit(descargar_partido, p, parse_pool)))
+                return
+
+        for _ in range(window):
+            encolar()
+
+        while en_vuelo:
+            i, p, fut = en_vuelo.popleft()
+            encolar()
+
+            res = {"players": [], "stats": [], "nav_link": None}
+            try:
+                if fut is not None:
+                    res = fut.result().result()
+                    stats_url = derive_team_stats_url(p["lineup_url"])
+                    nav_link = res["nav_link"]
+                    if not res["stats"] and nav_link and nav_link != stats_url:
+                        html = fetch_html(nav_link, require="hs-comparison", ttl=ttl_partido(p))
+                        res["stats"] = parse_pool.submit(parsear_stats_job, html, nav_link).result()
+            except Exception as e:
+                print(f"[crawl_pipeline] Error en {p['local']} vs {p['visitante']}: {e}")
+                continue
+
+            registrar(i, {
+                "partido": p,
+                "info": base_info_partido(p),
+                "players": apariciones_partido(p, res["players"]),
+                "team_stats": filas_team_stats(p, res["stats"]) if fut is not None else []
+            })
+
+
 ############################################################
 # MAIN
 ############################################################
@@ -494,103 +1178,83 @@ def main():
     print("=== Descargando temporada... ===")
 
     html = fetch_html(SEASON_URL, require="module-gameplan")
-    partidos = parsear_partidos(html)
-    print("Partidos encontrados:", len(partidos))
+    partidos = iter_partidos(html)
 
     # ========================
-    # Estado persistente
+    # Estado persistente (los CSV se recortan al último partido
+    # confirmado antes de leer el log de apariciones)
     # ========================
-    players_master = load_players()
-
-    results_rows = []
-    team_stats_rows = []
-
-    processed = {}
-    if os.path.exists(PROCESSED_JSON):
-        with open(PROCESSED_JSON, "r", encoding="utf-8") as f:
-            processed = json.load(f)
+    os.makedirs(dir_temporada(TEMPORADA), exist_ok=True)
+    processed = CheckpointJournal(ruta(PROCESSED_JOURNAL, TEMPORADA))
+    store = abrir_staging(temporada=TEMPORADA)
+    salida = abrir_salida(processed.offsets, store, processed.done)
+    processed.on_sync = salida.sync
+    processed.mark(salida.offsets())
+
+    players_master = load_players(store)
+
+    # Migración del checkpoint antiguo: cada clave solo vale para el primer
+    # partido que la produce (el código antiguo saltaba los siguientes sin procesarlos)
+    legacy = load_legacy(PROCESSED_JSON) if not len(processed) else set()
+    legacy_usadas = set()
+
+    # Partidos sin confirmar en el checkpoint, según se parsean de la página
+    # de temporada: el crawl empieza con el primero, sin esperar al resto
+    encontrados = [0]
+
+    def pendientes():
+        for i, p in enumerate(partidos, 1):
+            encontrados[0] = i
+            key = match_key(p)
+            lk = legacy_match_key(p)
+            if key not in processed and lk in legacy and lk not in legacy_usadas:
+                legacy_usadas.add(lk)
+                processed.commit(key, migrado=True)
+            if key in processed:
+                print(f"[{i}] Saltando {p['local']} vs {p['visitante']} (ya procesado)")
+                continue
+            yield i, p
+
+    def registrar(i, res):
+        p = res["partido"]
+        print(f"[{i}] Procesado {p['local']} vs {p['visitante']}")
+        registrar_partido(res, players_master, salida, processed)
 
     # ========================
     # Loop principal
     # ========================
-    for i, p in enumerate(partidos, 1):
-        match_id = f"{p['fecha']}|{p['local']}|{p['visitante']}"
-
-        if processed.get(match_id):
-            print(f"[{i}/{len(partidos)}] Saltando {p['local']} vs {p['visitante']} (ya procesado)")
-            continue
-
-        print(f"[{i}/{len(partidos)}] Procesando {p['local']} vs {p['visitante']}")
-
-        base_info = {
-            "jornada": p["jornada"],
-            "fecha": p["fecha"],
-            "local": p["local"],
-            "visitante": p["visitante"],
-            "resultado": p["resultado"],
-            "lineup_url": p["lineup_url"]
-        }
-
-        # ========================
-        # Lineups
-        # ========================
-        if p["lineup_url"]:
-            lineup_html = fetch_html(p["lineup_url"])
-            lineup_players = procesar_lineup_html(lineup_html)
-
-            for key, stats in lineup_players.items():
-                if key not in players_master:
-                    players_master[key] = stats
-                else:
-                    players_master[key]["minutos"] += stats["minutos"]
-                    players_master[key]["goles"] += stats["goles"]
-                    players_master[key]["partidos"] += stats["partidos"]
-
-        # ========================
-        # Team statistics
-        # ========================
-        if p["lineup_url"]:
-            stat_link = get_correct_team_stats_link_from_lineup(p["lineup_url"])
-            if stat_link:
-                stats = parse_team_statistics_page(stat_link)
-                for row in stats:
-                    team_stats_rows.append({
-                        "jornada": p["jornada"],
-                        "fecha": p["fecha"],
-                        "local": p["local"],
-                        "visitante": p["visitante"],
-                        "stat": row["stat"],
-                        "valor_local": row["home"],
-                        "valor_visitante": row["away"]
-                    })
-
-        # ========================
-        # Registrar partido
-        # ========================
-        results_rows.append(base_info)
-
-        processed[match_id] = True
-
-        # ========================
-        # Guardados seguros (mínimos)
-        # ========================
-        save_players(players_master)
-
-        with open(PROCESSED_JSON, "w", encoding="utf-8") as f:
-            json.dump(processed, f, indent=2)
-
-        time.sleep(1)
+    if CRAWL_MODE == "async":
+        print(f"=== Crawl asyncio ({CRAWL_CONCURRENCY} partidos en paralelo) ===")
+        asyncio.run(crawl_async(pendientes(), registrar))
+    elif CRAWL_MODE == "pipeline":
+        print(f"=== Crawl pipeline ({CRAWL_CONCURRENCY} descargas, {PARSE_WORKERS} procesos parser) ===")
+        crawl_pipeline(pendientes(), registrar)
+    else:
+        for i, p in pendientes():
+            print(f"[{i}] Procesando {p['local']} vs {p['visitante']}")
+            registrar(i, procesar_partido(p))
+    print("Partidos encontrados:", encontrados[0])
 
     # ========================
-    # Guardado final atómico
+    # Cierre: resultados y team stats ya están escritos;
+    # players_stats.csv se compacta una vez
     # ========================
     print("=== Guardando CSV finales ===")
 
-    safe_to_csv(pd.DataFrame(results_rows), RESULTS_CSV)
-    safe_to_csv(pd.DataFrame(team_stats_rows), TEAM_STATS_CSV)
+    save_players(players_master, store=store)
+    if DATA_FORMAT == "parquet":
+        exportar_columnar(store)
+    processed.close()
+    salida.close()
+    if store is not None:
+        store.close()
 
     print("=== FINALIZADO ===")
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        close_session()
+        get_metrics().export()
@@ -0,0 +1,197 @@
+###############################################
+# STAGING SQLITE ENTRE ETAPAS
+# Un único fichero .sqlite por ejecución que comparten
+# scrapper_final.py, convertidordatos.py y mysql_impoter.py:
+# tablas tipadas e indexadas en lugar de CSV intermedios.
+#
+#   STAGING_DB=staging.sqlite python scrapper_final.py
+#   STAGING_DB=staging.sqlite CSV_EXPORT=0 python convertidordatos.py   (sin CSV)
+# Con DATA_DIR hay un staging por temporada (DATA_DIR/temporada=<t>/staging.sqlite).
+###############################################
+
+import os
+import sqlite3
+from contextlib import contextmanager
+from typing import Optional
+
+import pandas as pd
+
+import rutas
+
+STAGING_DB = os.environ.get("STAGING_DB")                  # sin definir = solo CSV, como antes
+CSV_EXPORT = os.environ.get("CSV_EXPORT", "1") != "0"      # con STAGING_DB, escribir también los ficheros
+MATCH_KEY = "match_key"
+INDEX_COLUMNS = [("jornada",), ("equipo",), ("local", "visitante"), (MATCH_KEY,)]
+
+
+def tabla_de(path):
+    """'./team_stats.csv' -> 'team_stats' (la tabla se llama como el CSV)."""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _q(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _tipo_registro(hint):
+    if hint in (int, Optional[int]):
+        return "INTEGER"
+    if hint in (float, Optional[float]):
+        return "REAL"
+    if hint in (str, Optional[str]):
+        return "TEXT"
+    return ""   # StatValue: sin afinidad, cada valor se guarda con su tipo
+
+
+def _tipo_columna(dtype):
+    if dtype.kind in "iub":
+        return "INTEGER"
+    if dtype.kind == "f":
+        return "REAL"
+    return "TEXT"
+
+
+def _valores(df):
+    """Columnas como listas de objetos Python (NaN / NA -> None)."""
+    return [df[c].astype(object).where(df[c].notna(), None).tolist() for c in df.columns]
+
+
+class StagingStore:
+    """
+    Base SQLite de la ejecución. Las tablas del scraper llevan `match_key`:
+    write_match reemplaza las filas de un partido en una transacción y al
+    reanudar se descartan los partidos sin confirmar en el checkpoint.
+    Las tablas derivadas (convertidordatos) se reescriben con write_frames.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+    @contextmanager
+    def transaction(self):
+        self.conn.execute("BEGIN")
+        try:
+            yield self.conn
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def tablas(self):
+        return [r[0] for r in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+
+    def columnas(self, name):
+        return [r[1] for r in self.conn.execute(f"PRAGMA table_info({_q(name)})")]
+
+    def _indexar(self, name, columns):
+        for cols in INDEX_COLUMNS:
+            if all(c in columns for c in cols):
+                ix = _q(f"ix_{name}_{'_'.join(cols)}")
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS {ix} ON {_q(name)} ({', '.join(map(_q, cols))})")
+
+    ############################################################
+    # TABLAS POR PARTIDO (scraper)
+    ############################################################
+
+    def create_record_table(self, name, record_type):
+        hints = record_type.__annotations__
+        cols = [f"{_q(MATCH_KEY)} TEXT NOT NULL"] + [
+            f"{_q(f)} {_tipo_registro(hints.get(f))}".rstrip() for f in record_type._fields
+        ]
+        with self.transaction():
+            self.conn.execute(f"CREATE TABLE IF NOT EXISTS {_q(name)} ({', '.join(cols)})")
+            self._indexar(name, (MATCH_KEY,) + record_type._fields)
+        return name
+
+    def write_match(self, key, rows_by_table):
+        """Sustituye las filas del partido `key` en cada tabla (todo o nada)."""
+        with self.transaction():
+            for name, rows in rows_by_table.items():
+                self.conn.execute(f"DELETE FROM {_q(name)} WHERE {_q(MATCH_KEY)} = ?", (key,))
+                if rows:
+                    marks = ", ".join("?" * (len(rows[0]) + 1))
+                    self.conn.executemany(f"INSERT INTO {_q(name)} VALUES ({marks})",
+                                          ((key, *r) for r in rows))
+
+    def discard_uncommitted(self, tables, committed):
+        """
+        Borra las filas de partidos que no están en `committed` (claves del
+        checkpoint): escritas aquí pero cortadas antes de confirmarse.
+        """
+        with self.transaction():
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS _confirmados (k TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM _confirmados")
+            self.conn.executemany("INSERT INTO _confirmados VALUES (?)", ((k,) for k in committed))
+            for name in tables:
+                self.conn.execute(f"DELETE FROM {_q(name)} WHERE {_q(MATCH_KEY)} NOT IN (SELECT k FROM _confirmados)")
+
+    ############################################################
+    # TABLAS COMPLETAS (DataFrame)
+    ############################################################
+
+    def write_frames(self, frames):
+        """Reescribe varias tablas {nombre: DataFrame} en una sola transacción."""
+        with self.transaction():
+            for name, df in frames.items():
+                cols = [f"{_q(str(c))} {_tipo_columna(df[c].dtype)}" for c in df.columns]
+                self.conn.execute(f"DROP TABLE IF EXISTS {_q(name)}")
+                self.conn.execute(f"CREATE TABLE {_q(name)} ({', '.join(cols)})")
+                if len(df):
+                    marks = ", ".join("?" * len(df.columns))
+                    self.conn.executemany(f"INSERT INTO {_q(name)} VALUES ({marks})", zip(*_valores(df)))
+                self._indexar(name, [str(c) for c in df.columns])
+
+    def write_frame(self, name, df):
+        self.write_frames({name: df})
+
+    def read_frame(self, name, where=None, params=()):
+        """
+        Tabla como DataFrame en orden de inserción, sin la columna match_key
+        (mismas columnas que el CSV). `where` filtra con los índices, p.ej.
+        read_frame("team_stats", "jornada = ?", ("1. Jornada",)).
+        """
+        cols = [c for c in self.columnas(name) if c != MATCH_KEY]
+        if not cols:
+            raise KeyError(f"La tabla {name} no existe en {self.path}")
+        sql = f"SELECT {', '.join(map(_q, cols))} FROM {_q(name)}"
+        if where:
+            sql += f" WHERE {where}"
+        return pd.read_sql_query(sql + " ORDER BY rowid", self.conn, params=params)
+
+    def close(self):
+        self.conn.close()
+
+
+def abrir_staging(path=STAGING_DB, temporada=None):
+    """StagingStore de la ejecución, o None si STAGING_DB no está definido."""
+    if not path:
+        return None
+    path = rutas.ruta(path, temporada)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    return StagingStore(path)
+
+
+def leer_tabla(store, fichero, temporada=None, **read_csv):
+    """
+    Lee una tabla de la etapa anterior: del staging si lo hay, si no del
+    dataset de la temporada (CSV o Parquet, entero o por jornadas).
+    """
+    if store is not None:
+        return store.read_frame(tabla_de(fichero))
+    return rutas.leer(fichero, temporada, **read_csv)
+
+
+def escribir_tablas(store, frames, temporada=None, por_jornada=False):
+    """
+    Guarda {nombre: DataFrame}: en el staging (una transacción) y, si
+    CSV_EXPORT o no hay staging, también como dataset <nombre>.csv (o .parquet)
+    de la temporada, particionado por jornada si se pide.
+    """
+    if store is not None:
+        store.write_frames(frames)
+    if store is None or CSV_EXPORT:
+        for name, df in frames.items():
+            rutas.guardar(df, name + ".csv", temporada, por_jornada=por_jornada)
@@ -0,0 +1,93 @@
+###############################################
+# CSV DE SALIDA EN STREAMING (append por partido)
+# Los offsets de cada fichero se confirman en el checkpoint junto
+# al partido: al reanudar se recorta lo escrito sin confirmar
+###############################################
+
+import os
+
+from records import RecordTable
+from staging import tabla_de
+
+
+class StreamingCSV:
+    """
+    CSV abierto en append; cada write() añade las filas de un partido.
+    `committed`: tamaño confirmado en el checkpoint; si el fichero es más
+    largo (corte entre escribir y confirmar) se recorta a ese tamaño.
+    """
+
+    def __init__(self, path, record_type, committed=None):
+        self.path = path
+        self.record_type = record_type
+
+        if committed is not None and os.path.exists(path) and os.path.getsize(path) > committed:
+            with open(path, "r+b") as f:
+                f.truncate(committed)
+
+        nuevo = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._f = open(path, "a", encoding="utf-8", newline="")
+        if nuevo:
+            RecordTable(record_type).to_frame().to_csv(self._f, index=False)
+
+    def write(self, rows):
+        if rows:
+            RecordTable(self.record_type, rows).to_frame().to_csv(self._f, header=False, index=False)
+
+    def flush(self):
+        """Vuelca al sistema operativo y devuelve el tamaño actual en bytes."""
+        self._f.flush()
+        return os.fstat(self._f.fileno()).st_size
+
+    def sync(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+
+
+class MatchOutput:
+    """
+    Conjunto de salidas de la temporada.
+    files: {nombre: (ruta, tipo de registro)}; committed: offsets del checkpoint.
+    store: StagingStore opcional (una tabla por CSV, con el nombre del fichero);
+    done: claves confirmadas, las demás filas del staging se descartan.
+    csv=False escribe solo en el staging.
+    """
+
+    def __init__(self, files, committed=None, store=None, done=(), csv=True):
+        committed = committed or {}
+        self.store = store
+        self.tables = {}
+        if store is not None:
+            self.tables = {
+                name: store.create_record_table(tabla_de(path), record_type)
+                for name, (path, record_type) in files.items()
+            }
+            store.discard_uncommitted(self.tables.values(), done)
+        self.writers = {
+            name: StreamingCSV(path, record_type, committed.get(name))
+            for name, (path, record_type) in files.items()
+        } if csv else {}
+
+    def write_match(self, rows_by_name, key=None):
+        """Escribe las filas de un partido y devuelve los offsets a confirmar."""
+        if self.store is not None:
+            self.store.write_match(key, {self.tables[n]: rows for n, rows in rows_by_name.items()})
+        for name, rows in rows_by_name.items():
+            if name in self.writers:
+                self.writers[name].write(rows)
+        return self.offsets()
+
+    def offsets(self):
+        return {name: w.flush() for name, w in self.writers.items()}
+
+    def sync(self):
+        for w in self.writers.values():
+            w.sync()
+
+    def close(self):
+        for w in self.writers.values():
+            w.close()
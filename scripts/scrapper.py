@@ -1,72 +1,79 @@
-import time
+import os
+import sys
 import re
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+
+# Pool de Chrome y parsing lxml compartidos con el scraper de livefutbol (Entornoscript/)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Entornoscript"))
+from chrome_pool import get_pool
+from parse_lxml import parse_tree, Field, Spec, xp_class
 
 URL = "https://www.futbolfantasy.com/jugadores/antony/laliga-24-25"
 
 #https://www.futbolfantasy.com/jugadores/antony/laliga-24-25
 #https://www.futbolfantasy.com/jugadores/antony/laliga-25-26
 
-def obtener_datos(url):
+# Spec de la página de jugador (compilado al importar)
+PUNTOS = Field(f"//span[{xp_class('columna_puntos')}]", get="node")
+TITULO = Field(f"//h2[{xp_class('title')}]")
 
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")
+FILA_SPEC = Spec(
+    ".//tr",
+    jornada=Field(f".//td[{xp_class('bold')}]"),
+    equipos=Field(".//img/@alt", get="value", many=True),
+    puntos=Field(f".//span[{xp_class('columna_puntos')}]"),
+)
 
-    driver = webdriver.Chrome(
-        service=Service(ChromeDriverManager().install()), 
-        options=options
-    )
+def obtener_datos(url):
+
+    # Navegador del pool: espera a que JS pinte la tabla de puntos
+    html = get_pool().fetch(url, wait_class="columna_puntos")
+    if not html:
+        print("No se pudo cargar la página.")
+        return []
 
-    driver.get(url)
-    time.sleep(2)   # esperar carga JS
+    return parsear_datos(html)
 
-    html = driver.page_source
-    driver.quit()
 
-    soup = BeautifulSoup(html, "html.parser")
+def parsear_datos(html):
+    """Parte de parsing de obtener_datos (sin navegador)."""
+    tree = parse_tree(html)
 
     # -----------------------------------------
     # Buscar SOLO la tabla que contiene puntos
     # -----------------------------------------
 
-    tabla = soup.find("span", class_="columna_puntos")
-    if not tabla:
+    tabla = PUNTOS(tree)
+    if tabla is None:
         print("No se encontró tabla de puntos.")
         return []
 
     # Subir hasta la tabla
-    tabla = tabla.find_parent("table")
-    filas = tabla.find_all("tr")
+    tabla = next(tabla.iterancestors("table"), None)
 
     resultados = []
+    equipo_jugador = None
 
-    for fila in filas:
+    for _, fila in FILA_SPEC.extract(tabla):
 
-        td_bold = fila.find("td", class_="bold")
-        if not td_bold:
-            continue
-
-        texto = td_bold.get_text(strip=True)
-        if not texto.isdigit():
+        texto = fila["jornada"]
+        if texto is None or not texto.isdigit():
             continue
 
         jornada = int(texto)
 
         # Equipos
-        imgs = fila.find_all("img", alt=True)
-        if len(imgs) < 2:
+        equipos = fila["equipos"]
+        if len(equipos) < 2:
             continue
 
-        equipo1 = imgs[0]["alt"].strip()
-        equipo2 = imgs[1]["alt"].strip()
+        equipo1 = equipos[0].strip()
+        equipo2 = equipos[1].strip()
 
         # Determinar equipo del jugador
-        # Este dato lo sacamos del título
-        titulo = soup.find("h2", class_="title").get_text(strip=True)
-        equipo_jugador = titulo.split(" en ")[-1].replace("Puntos ", "").strip()
+        # Este dato lo sacamos del título (una sola vez)
+        if equipo_jugador is None:
+            titulo = TITULO(tree)
+            equipo_jugador = titulo.split(" en ")[-1].replace("Puntos ", "").strip()
 
         if equipo1 == equipo_jugador:
             sitio = "local"
@@ -78,13 +85,7 @@ def obtener_datos(url):
             continue
 
         # PUNTOS reales
-        span_puntos = fila.find("span", class_="columna_puntos")
-        if span_puntos:
-            puntos = span_puntos.get_text(strip=True)
-        else:
-            puntos = None
-
-        resultados.append((jornada, rival, sitio, puntos))
+        resultados.append((jornada, rival, sitio, fila["puntos"]))
 
     return resultados
 